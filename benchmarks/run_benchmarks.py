@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""Time the hot paths of the competition helpers on synthetic data.
+
+Every case builds its own synthetic inputs (offline, seeded) at a few sizes,
+runs a few timed repeats plus one tracemalloc run for peak memory, and the
+results are appended to a JSON history. --compare checks the new run against
+the previous one in the history and exits non-zero on slowdowns.
+
+    python benchmarks/run_benchmarks.py --sizes small,medium --compare
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+ENEFIT_DIR = REPO_ROOT / "predict-energy-behavior-of-prosumers"
+MANIA_SCRIPTS_DIR = REPO_ROOT / "march-machine-learning-mania-2026" / "scripts"
+for path in (ENEFIT_DIR, MANIA_SCRIPTS_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+DEFAULT_HISTORY = REPO_ROOT / "benchmarks" / "history.json"
+SIZES = ("small", "medium", "large")
+
+# A prepare function gets the size parameters and a scratch folder, writes its
+# inputs there and returns the zero-argument callable that is timed.
+PrepareFn = Callable[[dict[str, Any], Path], Callable[[], Any]]
+
+
+@dataclass
+class BenchmarkCase:
+    name: str
+    sizes: dict[str, dict[str, Any]]
+    prepare: PrepareFn
+
+
+@dataclass
+class BenchmarkResult:
+    case: str
+    size: str
+    params: dict[str, Any]
+    repeats: int
+    seconds_min: float
+    seconds_median: float
+    peak_mb: float
+
+
+def _prepare_solar_angles(params: dict[str, Any], work_dir: Path) -> Callable[[], Any]:
+    from utils.solar_tracking import calculate_angles_array, day_of_year_array
+
+    rng = np.random.default_rng(0)
+    n_rows = params["rows"]
+    local_time = np.datetime64("2022-01-01T00:00:00", "us") + rng.integers(0, 2 * 365 * 24, n_rows).astype(
+        "timedelta64[h]"
+    )
+    longitude = rng.uniform(21.7, 28.2, n_rows).round(1)
+    latitude = rng.uniform(57.6, 59.7, n_rows).round(1)
+    day_of_year = day_of_year_array(local_time)
+    return lambda: calculate_angles_array(local_time, day_of_year, longitude, latitude, utc_offset=2)
+
+
+def _prepare_mock_api_replay(params: dict[str, Any], work_dir: Path) -> Callable[[], Any]:
+    import public_timeseries_testing_util
+
+    rng = np.random.default_rng(0)
+    n_blocks, rows = params["blocks"], params["rows_per_block"]
+    input_paths = []
+    for i, name in enumerate(("test.csv", "client.csv", "sample_submission.csv")):
+        blocks = np.repeat(np.arange(n_blocks), rows // (i + 1))
+        df = pd.DataFrame(
+            {
+                "data_block_id": blocks,
+                "county": rng.integers(0, 16, blocks.size),
+                "value": rng.normal(size=blocks.size),
+                "row_id": np.arange(blocks.size),
+            }
+        )
+        path = work_dir / name
+        df.to_csv(path, index=False)
+        input_paths.append(str(path))
+
+    def replay() -> int:
+        env = public_timeseries_testing_util.make_env()
+        env.input_paths = input_paths
+        env.submission_path = str(work_dir / "submission.csv")
+        served = 0
+        for test, client, sample_submission in env.iter_test():
+            served += len(test)
+            env.predict(sample_submission[["row_id", "value"]])
+        return served
+
+    return replay
+
+
+def _prepare_profile_csvs(params: dict[str, Any], work_dir: Path) -> Callable[[], Any]:
+    from profile_input_data import profile_csvs
+
+    rng = np.random.default_rng(0)
+    input_dir = work_dir / "input"
+    input_dir.mkdir()
+    n_rows = params["rows"]
+    for i in range(params["files"]):
+        pd.DataFrame(
+            {
+                "Season": rng.integers(1985, 2026, n_rows),
+                "TeamID": rng.integers(1101, 1480, n_rows),
+                "Score": rng.integers(40, 110, n_rows),
+                "Rate": rng.normal(size=n_rows),
+                "Loc": rng.choice(["H", "A", "N"], n_rows),
+                "Name": pd.Series(rng.integers(0, 5000, n_rows)).map("team_{}".format),
+            }
+        ).to_csv(input_dir / f"Synthetic{i}.csv", index=False)
+
+    def profile() -> None:
+        with tempfile.TemporaryDirectory(dir=work_dir) as reports_dir:
+            profile_csvs(input_dir, Path(reports_dir), preview_rows=5, use_cache=False)
+
+    return profile
+
+
+def _prepare_generate_candidates(params: dict[str, Any], work_dir: Path) -> Callable[[], Any]:
+    from generate_daily_submission_candidates import generate_candidates
+
+    rng = np.random.default_rng(0)
+    n_rows = params["rows"]
+    team_a = rng.integers(1101, 1400, n_rows)
+    ids = pd.Series(team_a).map("2026_{}_".format) + pd.Series(team_a + rng.integers(1, 80, n_rows)).astype(str)
+    sample_submission = work_dir / "SampleSubmissionStage2.csv"
+    pd.DataFrame({"ID": ids, "Pred": 0.5}).to_csv(sample_submission, index=False)
+    return lambda: generate_candidates(
+        sample_submission=sample_submission,
+        output_dir=work_dir / "submissions",
+        date_tag="bench",
+        max_files=5,
+        seed=2026,
+    )
+
+
+CASES = {
+    case.name: case
+    for case in (
+        BenchmarkCase(
+            "solar_angles",
+            {"small": {"rows": 10_000}, "medium": {"rows": 200_000}, "large": {"rows": 2_000_000}},
+            _prepare_solar_angles,
+        ),
+        BenchmarkCase(
+            "mock_api_replay",
+            {
+                "small": {"blocks": 20, "rows_per_block": 500},
+                "medium": {"blocks": 200, "rows_per_block": 2_000},
+                "large": {"blocks": 600, "rows_per_block": 5_000},
+            },
+            _prepare_mock_api_replay,
+        ),
+        BenchmarkCase(
+            "profile_csvs",
+            {
+                "small": {"files": 3, "rows": 10_000},
+                "medium": {"files": 3, "rows": 200_000},
+                "large": {"files": 3, "rows": 1_000_000},
+            },
+            _prepare_profile_csvs,
+        ),
+        BenchmarkCase(
+            "generate_candidates",
+            {"small": {"rows": 10_000}, "medium": {"rows": 130_000}, "large": {"rows": 1_000_000}},
+            _prepare_generate_candidates,
+        ),
+    )
+}
+
+
+def run_case(case: BenchmarkCase, size: str, repeats: int, work_dir: Path) -> BenchmarkResult:
+    params = case.sizes[size]
+    case_dir = work_dir / f"{case.name}_{size}"
+    case_dir.mkdir(parents=True)
+    fn = case.prepare(params, case_dir)
+
+    fn()  # warm-up: imports, file caches
+    seconds = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        seconds.append(time.perf_counter() - started)
+
+    # tracemalloc slows Python-heavy code down, so memory gets its own run
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return BenchmarkResult(
+        case=case.name,
+        size=size,
+        params=params,
+        repeats=repeats,
+        seconds_min=min(seconds),
+        seconds_median=statistics.median(seconds),
+        peak_mb=peak / 1024 / 1024,
+    )
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def load_history(path: Path) -> list[dict[str, Any]]:
+    if not path.exists():
+        return []
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def previous_run(history: list[dict[str, Any]], current: dict[str, Any]) -> dict[str, Any] | None:
+    """The latest run in history that measured at least one of current's (case, size) pairs."""
+    wanted = {(r["case"], r["size"]) for r in current["results"]}
+    for run in reversed(history):
+        if run is not current and wanted & {(r["case"], r["size"]) for r in run["results"]}:
+            return run
+    return None
+
+
+def compare_runs(
+    previous: dict[str, Any], current: dict[str, Any], threshold: float, min_seconds: float
+) -> pd.DataFrame:
+    """Median time of every (case, size) in both runs; a slowdown is a ratio above
+    1 + threshold on a baseline of at least min_seconds (shorter runs are noise)."""
+    before = pd.DataFrame(previous["results"])[["case", "size", "seconds_median", "peak_mb"]]
+    after = pd.DataFrame(current["results"])[["case", "size", "seconds_median", "peak_mb"]]
+    table = before.merge(after, on=["case", "size"], suffixes=("_before", "_after"))
+    table["ratio"] = table["seconds_median_after"] / table["seconds_median_before"]
+    table["slowdown"] = (table["ratio"] > 1.0 + threshold) & (table["seconds_median_before"] >= min_seconds)
+    return table
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the project's hot paths on synthetic data.")
+    parser.add_argument("--cases", type=str, default=",".join(CASES), help=f"Comma-separated subset of {list(CASES)}.")
+    parser.add_argument("--sizes", type=str, default="small,medium", help=f"Comma-separated subset of {list(SIZES)}.")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--label", type=str, default="", help="Free-form note stored with the run.")
+    parser.add_argument("--history", type=Path, default=DEFAULT_HISTORY)
+    parser.add_argument("--compare", action="store_true", help="Compare against the previous run in the history.")
+    parser.add_argument(
+        "--compare-only", action="store_true", help="Only compare the last two runs in the history; run nothing."
+    )
+    parser.add_argument("--threshold", type=float, default=0.20, help="Flag median slowdowns above this fraction.")
+    parser.add_argument("--min-seconds", type=float, default=0.01, help="Ignore cases faster than this.")
+    args = parser.parse_args()
+
+    history = load_history(args.history)
+    if args.compare_only:
+        if len(history) < 2:
+            raise SystemExit(f"Need two runs in {args.history} to compare")
+        current = history[-1]
+        previous = previous_run(history[:-1], current)
+    else:
+        unknown = set(args.cases.split(",")) - set(CASES) | set(args.sizes.split(",")) - set(SIZES)
+        if unknown:
+            raise SystemExit(f"Unknown cases/sizes: {sorted(unknown)}")
+        results = []
+        with tempfile.TemporaryDirectory(prefix="kaggle_bench_") as work_dir:
+            for name in args.cases.split(","):
+                for size in args.sizes.split(","):
+                    result = run_case(CASES[name], size, args.repeats, Path(work_dir))
+                    results.append(result)
+                    print(
+                        f"{result.case:<22} {result.size:<7} median {result.seconds_median:8.3f}s"
+                        f"  min {result.seconds_min:8.3f}s  peak {result.peak_mb:8.1f} MB"
+                    )
+        current = {
+            "timestamp_utc": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "label": args.label,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "results": [asdict(r) for r in results],
+        }
+        previous = previous_run(history, current)
+        history.append(current)
+        args.history.parent.mkdir(parents=True, exist_ok=True)
+        args.history.write_text(json.dumps(history, indent=2), encoding="utf-8")
+        print(f"Appended run {len(history)} to {args.history}")
+
+    if not (args.compare or args.compare_only):
+        return
+    if previous is None:
+        print("No previous run to compare against.")
+        return
+    table = compare_runs(previous, current, args.threshold, args.min_seconds)
+    print(f"\nvs {previous.get('git_commit')} ({previous['timestamp_utc']}):")
+    print(table.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    slow = table[table["slowdown"]]
+    if not slow.empty:
+        print(f"\n{len(slow)} slowdown(s) above {args.threshold:.0%}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
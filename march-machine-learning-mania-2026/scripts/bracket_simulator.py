@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""Monte Carlo NCAA tournament simulator for stress-testing submission candidates."""
+
+from __future__ import annotations
+
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from generate_daily_submission_candidates import load_candidate_store, parse_ids
+
+N_ROUNDS = 6
+# logistic scale per seed line for the --truth seed baseline
+SEED_LOGISTIC_SCALE = 0.175
+
+
+@dataclass
+class Bracket:
+    """One gender/season bracket compiled to integer arrays.
+
+    Nodes 0..n_teams-1 are the seeded teams; node n_teams + s is the winner of
+    slots[s]. Slots are in dependency order, so a single pass over them plays
+    the whole tournament.
+    """
+
+    season: int
+    team_ids: np.ndarray
+    seeds: np.ndarray
+    slots: np.ndarray
+    rounds: np.ndarray
+    strong: np.ndarray
+    weak: np.ndarray
+
+    @property
+    def n_teams(self) -> int:
+        return int(self.team_ids.size)
+
+
+def _slot_round(slot: str) -> int:
+    # "R1W1" .. "R6CH"; play-in slots are named after the seed they fill, e.g. "W16"
+    return int(slot[1]) if slot[0] == "R" and slot[1].isdigit() else 0
+
+
+def compile_bracket(slots: pd.DataFrame, seeds: pd.DataFrame, season: int) -> Bracket:
+    seeds = seeds[seeds["Season"] == season]
+    slots = slots[slots["Season"] == season]
+    if seeds.empty or slots.empty:
+        raise ValueError(f"No seeds/slots for season {season}")
+
+    order = np.argsort(seeds["TeamID"].to_numpy(), kind="stable")
+    team_ids = seeds["TeamID"].to_numpy(dtype=np.int64)[order]
+    seed_labels = seeds["Seed"].to_numpy(dtype=str)[order]
+    node_of = {label: i for i, label in enumerate(seed_labels)}
+
+    pending = list(slots[["Slot", "StrongSeed", "WeakSeed"]].itertuples(index=False, name=None))
+    compiled: list[tuple[str, int, int]] = []
+    while pending:
+        ready = [row for row in pending if row[1] in node_of and row[2] in node_of]
+        if not ready:
+            raise ValueError(f"Unresolvable slots in season {season}: {[row[0] for row in pending[:5]]}")
+        for slot, strong_seed, weak_seed in ready:
+            node_of[slot] = team_ids.size + len(compiled)
+            compiled.append((slot, node_of[strong_seed], node_of[weak_seed]))
+        pending = [row for row in pending if row[0] not in node_of]
+
+    names = np.array([row[0] for row in compiled])
+    return Bracket(
+        season=int(season),
+        team_ids=team_ids,
+        seeds=seed_labels,
+        slots=names,
+        rounds=np.array([_slot_round(name) for name in names], dtype=np.int64),
+        strong=np.array([row[1] for row in compiled], dtype=np.int64),
+        weak=np.array([row[2] for row in compiled], dtype=np.int64),
+    )
+
+
+def load_bracket(input_dir: Path, gender: str, season: int | None = None) -> Bracket:
+    slots = pd.read_csv(input_dir / f"{gender}NCAATourneySlots.csv")
+    seeds = pd.read_csv(input_dir / f"{gender}NCAATourneySeeds.csv")
+    for name, frame, columns in (
+        ("slots", slots, {"Season", "Slot", "StrongSeed", "WeakSeed"}),
+        ("seeds", seeds, {"Season", "Seed", "TeamID"}),
+    ):
+        if not columns.issubset(frame.columns):
+            raise ValueError(f"{gender} tourney {name} file is missing columns {sorted(columns - set(frame.columns))}")
+    if season is None:
+        season = int(seeds["Season"].max())
+    return compile_bracket(slots, seeds, season)
+
+
+def pairwise_matrix(
+    bracket: Bracket, ids: pd.Series | np.ndarray | tuple, preds: np.ndarray, default: float = 0.5
+) -> np.ndarray:
+    """(n_candidates, n_teams, n_teams) float32 win probabilities of the bracket's
+    teams, read from submission rows (Pred = P(lower TeamID wins))."""
+    season, team_a, team_b = ids if isinstance(ids, tuple) else parse_ids(ids)
+    preds = np.asarray(preds, dtype=np.float32)
+    if preds.ndim == 1:
+        preds = preds[:, None]
+
+    n = bracket.n_teams
+    out = np.full((preds.shape[1], n, n), default, dtype=np.float32)
+    rows = np.flatnonzero(season == bracket.season)
+    pos_a = np.minimum(np.searchsorted(bracket.team_ids, team_a[rows]), n - 1)
+    pos_b = np.minimum(np.searchsorted(bracket.team_ids, team_b[rows]), n - 1)
+    hit = (bracket.team_ids[pos_a] == team_a[rows]) & (bracket.team_ids[pos_b] == team_b[rows])
+    rows, pos_a, pos_b = rows[hit], pos_a[hit], pos_b[hit]
+
+    values = preds[rows].T
+    out[:, pos_a, pos_b] = values
+    out[:, pos_b, pos_a] = 1.0 - values
+    return out
+
+
+def seed_matrix(bracket: Bracket, scale: float = SEED_LOGISTIC_SCALE) -> np.ndarray:
+    """Baseline truth where only the seed line matters."""
+    seed_line = np.array([int(label[1:3]) for label in bracket.seeds], dtype=np.float64)
+    probs = 1.0 / (1.0 + np.exp(-scale * (seed_line[None, :] - seed_line[:, None])))
+    return probs.astype(np.float32)
+
+
+@dataclass
+class SimulationResult:
+    bracket: Bracket
+    n_sims: int
+    round_wins: np.ndarray
+    sq_err: np.ndarray
+
+    def advancement(self) -> pd.DataFrame:
+        """Probability of each team winning its game in every round (round 0 is the play-in)."""
+        table = pd.DataFrame({"TeamID": self.bracket.team_ids, "Seed": self.bracket.seeds})
+        in_play_in = np.isin(
+            np.arange(self.bracket.n_teams),
+            np.r_[self.bracket.strong[self.bracket.rounds == 0], self.bracket.weak[self.bracket.rounds == 0]],
+        )
+        table["reach_R1"] = np.where(in_play_in, self.round_wins[:, 0] / self.n_sims, 1.0)
+        for r in range(1, N_ROUNDS + 1):
+            table[f"win_R{r}"] = self.round_wins[:, r] / self.n_sims
+        return table.rename(columns={f"win_R{N_ROUNDS}": "champion"}).sort_values(
+            "champion", ascending=False, kind="stable", ignore_index=True
+        )
+
+
+def _simulate_chunk(
+    bracket: Bracket, truth: np.ndarray, candidates: np.ndarray, n_sims: int, seed: np.random.SeedSequence
+) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    n = bracket.n_teams
+    winners = np.empty((n_sims, n + bracket.slots.size), dtype=np.int16)
+    winners[:, :n] = np.arange(n, dtype=np.int16)
+    round_wins = np.zeros((n, N_ROUNDS + 1), dtype=np.int64)
+    sq_err = np.zeros((candidates.shape[0], n_sims), dtype=np.float64)
+
+    for s, (strong, weak, rnd) in enumerate(zip(bracket.strong, bracket.weak, bracket.rounds)):
+        a = winners[:, strong]
+        b = winners[:, weak]
+        a_won = rng.random(n_sims, dtype=np.float32) < truth[a, b]
+        winner = np.where(a_won, a, b)
+        winners[:, n + s] = winner
+        round_wins[:, rnd] += np.bincount(winner, minlength=n)
+        sq_err += (candidates[:, a, b] - a_won) ** 2
+    return round_wins, sq_err
+
+
+def simulate(
+    bracket: Bracket,
+    truth: np.ndarray,
+    candidates: np.ndarray | None = None,
+    n_sims: int = 100_000,
+    seed: int = 2026,
+    chunk_sims: int = 25_000,
+    workers: int = 1,
+) -> SimulationResult:
+    """Play n_sims tournaments with game outcomes drawn from truth[i, j] = P(i beats j).
+
+    Every chunk plays all its simulations at once, one slot at a time; chunks
+    run in worker processes when workers > 1. candidates is an
+    (n_candidates, n_teams, n_teams) stack from pairwise_matrix; sq_err holds
+    each candidate's summed squared error on the games of every simulation.
+    """
+    truth = np.asarray(truth, dtype=np.float32)
+    if candidates is None:
+        candidates = truth[None]
+    sizes = [min(chunk_sims, n_sims - start) for start in range(0, n_sims, chunk_sims)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    if workers > 1 and len(sizes) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(
+                pool.map(_simulate_chunk, [bracket] * len(sizes), [truth] * len(sizes),
+                         [candidates] * len(sizes), sizes, seeds)
+            )
+    else:
+        parts = [_simulate_chunk(bracket, truth, candidates, size, ss) for size, ss in zip(sizes, seeds)]
+
+    return SimulationResult(
+        bracket=bracket,
+        n_sims=n_sims,
+        round_wins=sum(part[0] for part in parts),
+        sq_err=np.concatenate([part[1] for part in parts], axis=1),
+    )
+
+
+def expected_brier(results: list[SimulationResult], names: list[str]) -> pd.DataFrame:
+    """Brier over all games of each simulated tournament (all genders pooled, as
+    on the leaderboard), summarised across simulations."""
+    games = sum(result.bracket.slots.size for result in results)
+    brier = sum(result.sq_err for result in results) / games
+    return pd.DataFrame(
+        {
+            "strategy": names,
+            "expected_brier": brier.mean(axis=1),
+            "brier_std": brier.std(axis=1),
+            "brier_p05": np.quantile(brier, 0.05, axis=1),
+            "brier_p95": np.quantile(brier, 0.95, axis=1),
+        }
+    ).sort_values("expected_brier", kind="stable", ignore_index=True)
+
+
+def _load_candidates(paths: list[Path], store: Path | None) -> tuple[np.ndarray, list[str], np.ndarray]:
+    if store is not None:
+        return load_candidate_store(store)
+    frames = [pd.read_csv(path) for path in paths]
+    ids = frames[0]["ID"].to_numpy(dtype=str)
+    columns = [df.set_index("ID")["Pred"].reindex(ids).to_numpy(dtype=np.float64) for df in frames]
+    return ids, [path.stem for path in paths], np.column_stack(columns)
+
+
+def _truth_matrix(truth: str, bracket: Bracket, input_dir: Path, gender: str) -> np.ndarray:
+    if truth == "seed":
+        return seed_matrix(bracket)
+    if truth in ("elo", "massey"):
+        from matchup_matrix import matrices_from_ratings
+        from ratings import compute_ratings, elo_probability, massey_probability
+
+        probability = {"elo": elo_probability, "massey": massey_probability}[truth]
+        ratings = compute_ratings(input_dir, genders=(gender,))
+        matrix = matrices_from_ratings(ratings, truth, probability, seasons=np.array([bracket.season]))
+        matrix = matrix[(gender, bracket.season)]
+        pos = np.minimum(np.searchsorted(matrix.team_ids, bracket.team_ids), matrix.team_ids.size - 1)
+        found = matrix.team_ids[pos] == bracket.team_ids
+        return np.where(found[:, None] & found[None, :], matrix.probs[np.ix_(pos, pos)], np.float32(0.5))
+    submission = pd.read_csv(truth)
+    return pairwise_matrix(bracket, submission["ID"], submission["Pred"].to_numpy())[0]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Simulate the NCAA tournaments and score candidates.")
+    parser.add_argument("--input-dir", type=Path, default=Path("input"))
+    parser.add_argument("--season", type=int, default=None, help="Default: latest season in the seeds file.")
+    parser.add_argument("--genders", type=str, default="M,W")
+    parser.add_argument(
+        "--truth",
+        type=str,
+        default="seed",
+        help="Game probabilities to simulate with: seed, elo, massey or a submission CSV.",
+    )
+    parser.add_argument("--candidates", type=Path, nargs="*", default=[], help="Submission CSVs to score.")
+    parser.add_argument("--store", type=Path, default=None, help="A candidates.npz store to score instead.")
+    parser.add_argument("--sims", type=int, default=100_000)
+    parser.add_argument("--chunk-sims", type=int, default=25_000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=2026)
+    parser.add_argument("--output-dir", type=Path, default=Path("reports") / "bracket_simulation")
+    args = parser.parse_args()
+
+    candidate_data = _load_candidates(args.candidates, args.store) if args.candidates or args.store else None
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+
+    started = time.perf_counter()
+    results = []
+    for gender in args.genders.split(","):
+        bracket = load_bracket(args.input_dir, gender, args.season)
+        truth = _truth_matrix(args.truth, bracket, args.input_dir, gender)
+        candidates = None
+        if candidate_data is not None:
+            ids, _, preds = candidate_data
+            candidates = pairwise_matrix(bracket, parse_ids(ids), preds)
+        result = simulate(bracket, truth, candidates, args.sims, args.seed, args.chunk_sims, args.workers)
+        results.append(result)
+        path = args.output_dir / f"{gender}_{bracket.season}_advancement.csv"
+        result.advancement().to_csv(path, index=False)
+        print(f"{gender} {bracket.season}: {bracket.slots.size} games x {args.sims:,} sims -> {path}")
+
+    if candidate_data is not None:
+        scores = expected_brier(results, candidate_data[1])
+        scores.to_csv(args.output_dir / "expected_brier.csv", index=False)
+        print(scores.to_string(index=False))
+    print(f"Done in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
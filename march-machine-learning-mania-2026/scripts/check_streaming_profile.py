@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Check that chunked (streaming) profiles match exact profiles.
+
+Chunks infer their own dtypes (int64 until a chunk holds a null, then float64,
+object once it holds text), so this profiles files both ways and compares
+every field the streaming profile reports as exact. The built-in files are
+written so that every field, the approximate ones included, must match; pass
+CSV paths to check real ones too.
+
+    python scripts/check_streaming_profile.py --chunksize 2 input/*.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import tempfile
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from profile_input_data import _profile_file, _profile_file_streaming
+
+# with chunks of 2 rows, column a is read as int64 and float64 (null) or object (text)
+NULL_CHUNK_CSV = "a,b\n1,x\n2,y\n1,x\n2,y\n,z\n1,x\n"
+TEXT_CHUNK_CSV = "a,b\n1,x\n2,y\n1,x\n2,y\nq,z\n1,x\n"
+# a sparse text column: chunks of 4 rows holding only nulls are read as float64
+SPARSE_TEXT_CSV = "id,event\n" + "".join(
+    f"{i},{'kickoff' if i == 0 else 'touchdown' if i == 6 else ''}\n" for i in range(10)
+)
+
+
+def _synthetic_frame(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(
+        {
+            "Season": rng.integers(2020, 2026, n_rows),
+            "TeamID": rng.integers(1101, 1110, n_rows).astype(float),
+            "Score": rng.integers(40, 50, n_rows).astype(float),
+            "Loc": rng.choice(["H", "A", "N"], n_rows),
+            "OT": rng.choice([True, False], n_rows).astype(object),
+        }
+    )
+    # nulls in every column but Season, sparse enough that most chunks have none
+    for col, rate in (("TeamID", 0.02), ("Score", 0.05), ("Loc", 0.03), ("OT", 0.02)):
+        df.loc[rng.random(n_rows) < rate, col] = None
+    return df
+
+
+def compare_profiles(csv_path: Path, chunksize: int, strict: bool = False) -> list[str]:
+    """Differences between the exact and the streaming profile of csv_path; with
+    strict, fields the streaming profile marks approximate are compared too."""
+    exact_summary, exact = _profile_file(csv_path, preview_rows=0)
+    stream_summary, stream = _profile_file_streaming(csv_path, preview_rows=0, chunksize=chunksize)
+    approximate = set() if strict else set(stream["approximate_fields"])
+    problems = []
+    for field in ("rows", "columns", "duplicate_rows", "missing_cells", "min_season", "max_season"):
+        if field in approximate:
+            continue
+        if getattr(exact_summary, field) != getattr(stream_summary, field):
+            problems.append(f"{field}: exact {getattr(exact_summary, field)} vs {getattr(stream_summary, field)}")
+
+    for col, expected in exact["column_profiles"].items():
+        got = stream["column_profiles"][col]
+        for field in ("non_null", "null_count", "nunique_non_null", "numeric_stats", "top_values"):
+            if f"column_profiles.{col}.{field}" in approximate or field not in expected or field not in got:
+                continue
+            if field == "top_values":
+                # values tied on count may come back in any order; compare the counts
+                same = sorted(expected[field].values()) == sorted(got[field].values())
+            else:
+                same = _same(expected[field], got[field])
+            if not same:
+                problems.append(f"{col}.{field}: exact {expected[field]} vs {got[field]}")
+    return problems
+
+
+def _same(a: Any, b: Any) -> bool:
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_same(a[k], b[k]) for k in a)
+    if isinstance(a, float) and isinstance(b, float):
+        return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
+    return a == b
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare streaming and exact CSV profiles.")
+    parser.add_argument("csv_paths", type=Path, nargs="*")
+    parser.add_argument("--chunksize", type=int, default=2)
+    args = parser.parse_args()
+
+    failures = 0
+    with tempfile.TemporaryDirectory(prefix="profile_check_") as tmp:
+        checks = []
+        for name, text, chunksize in (
+            ("null_chunk.csv", NULL_CHUNK_CSV, 2),
+            ("text_chunk.csv", TEXT_CHUNK_CSV, 2),
+            ("sparse_text.csv", SPARSE_TEXT_CSV, 4),
+        ):
+            (Path(tmp) / name).write_text(text, encoding="utf-8")
+            checks.append((Path(tmp) / name, chunksize, True))
+        synthetic = Path(tmp) / "synthetic.csv"
+        _synthetic_frame(5_000).to_csv(synthetic, index=False)
+        checks.append((synthetic, 97, True))
+        checks += [(path, args.chunksize, False) for path in args.csv_paths]
+        for csv_path, chunksize, strict in checks:
+            problems = compare_profiles(csv_path, chunksize, strict)
+            failures += bool(problems)
+            print(f"{csv_path.name} (chunksize={chunksize}): {'ok' if not problems else 'MISMATCH'}")
+            for problem in problems:
+                print(f"  {problem}")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
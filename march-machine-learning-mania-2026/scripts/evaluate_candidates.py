@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""Score submission candidates offline with the Brier score against past tourney results."""
+
+from __future__ import annotations
+
+import argparse
+import json
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from generate_daily_submission_candidates import load_candidate_store, parse_ids
+
+RESULT_FILES = ("MNCAATourneyCompactResults.csv", "WNCAATourneyCompactResults.csv")
+# Women's TeamIDs start at 3000, men's stay below it.
+WOMEN_TEAM_ID_MIN = 3000
+
+
+@dataclass
+class Outcomes:
+    """Tourney outcomes keyed by season/low team/high team, sorted for searchsorted."""
+
+    keys: np.ndarray
+    low_team_won: np.ndarray
+
+
+def _matchup_keys(season: np.ndarray, team_a: np.ndarray, team_b: np.ndarray) -> np.ndarray:
+    low = np.minimum(team_a, team_b)
+    high = np.maximum(team_a, team_b)
+    return season * 100_000_000 + low * 10_000 + high
+
+
+def load_outcomes(input_dir: Path, result_files: tuple[str, ...] = RESULT_FILES) -> Outcomes:
+    frames = []
+    for name in result_files:
+        path = input_dir / name
+        if path.exists():
+            frames.append(pd.read_csv(path, usecols=["Season", "WTeamID", "LTeamID"]))
+    if not frames:
+        raise FileNotFoundError(f"No tourney result files found in {input_dir}")
+    results = pd.concat(frames, ignore_index=True)
+
+    season = results["Season"].to_numpy(dtype=np.int64)
+    winner = results["WTeamID"].to_numpy(dtype=np.int64)
+    loser = results["LTeamID"].to_numpy(dtype=np.int64)
+    keys = _matchup_keys(season, winner, loser)
+    low_team_won = (winner < loser).astype(np.float64)
+
+    order = np.argsort(keys, kind="stable")
+    return Outcomes(keys=keys[order], low_team_won=low_team_won[order])
+
+
+def brier_scores(
+    ids: pd.Series | np.ndarray, preds: np.ndarray, outcomes: Outcomes
+) -> tuple[np.ndarray, pd.DataFrame]:
+    """Brier score of every candidate column in preds over the IDs that were actually played.
+
+    Returns the overall scores (one per column) and a long frame of per
+    gender/season scores with columns gender, season, games, candidate, brier.
+    """
+    preds = np.asarray(preds, dtype=np.float64)
+    if preds.ndim == 1:
+        preds = preds[:, None]
+    season, team_a, team_b = parse_ids(ids)
+    keys = _matchup_keys(season, team_a, team_b)
+
+    if outcomes.keys.size:
+        pos = np.minimum(np.searchsorted(outcomes.keys, keys), outcomes.keys.size - 1)
+        played = outcomes.keys[pos] == keys
+    else:
+        pos = np.zeros(keys.size, dtype=np.int64)
+        played = np.zeros(keys.size, dtype=bool)
+    if not played.any():
+        return np.full(preds.shape[1], np.nan), pd.DataFrame(
+            columns=["gender", "season", "games", "candidate", "brier"]
+        )
+
+    # Pred is the probability that the lower TeamId wins.
+    y = outcomes.low_team_won[pos[played]]
+    y = np.where(team_a[played] < team_b[played], y, 1.0 - y)
+    sq_err = (preds[played] - y[:, None]) ** 2
+    overall = sq_err.mean(axis=0)
+
+    gender = np.where(team_a[played] >= WOMEN_TEAM_ID_MIN, 1, 0)
+    group = gender * 10_000 + season[played]
+    order = np.argsort(group, kind="stable")
+    group_sorted = group[order]
+    starts = np.flatnonzero(np.r_[True, group_sorted[1:] != group_sorted[:-1]])
+    games = np.diff(np.r_[starts, group_sorted.size])
+    group_scores = np.add.reduceat(sq_err[order], starts, axis=0) / games[:, None]
+
+    group_ids = group_sorted[starts]
+    n_groups, n_candidates = group_scores.shape
+    by_group = pd.DataFrame(
+        {
+            "gender": np.repeat(np.where(group_ids // 10_000 == 1, "W", "M"), n_candidates),
+            "season": np.repeat(group_ids % 10_000, n_candidates),
+            "games": np.repeat(games, n_candidates),
+            "candidate": np.tile(np.arange(n_candidates), n_groups),
+            "brier": group_scores.ravel(),
+        }
+    )
+    return overall, by_group
+
+
+def _load_run_candidates(run_dir: Path, manifest: dict) -> tuple[np.ndarray, list[str], np.ndarray]:
+    store = manifest.get("candidate_store")
+    if store:
+        # new manifests store the file name; older ones a path relative to the writer's cwd
+        for path in (run_dir / Path(store).name, Path(store)):
+            if path.exists():
+                return load_candidate_store(path)
+        raise FileNotFoundError(f"Candidate store {store} named in {run_dir / 'manifest.json'} not found")
+
+    ids = None
+    names: list[str] = []
+    columns: list[np.ndarray] = []
+    for candidate in manifest["candidates"]:
+        path = Path(candidate["file"])
+        if not path.exists():
+            path = run_dir / path.name
+        df = pd.read_csv(path)
+        if ids is None:
+            ids = df["ID"].to_numpy(dtype=str)
+        elif not np.array_equal(ids, df["ID"].to_numpy(dtype=str)):
+            df = df.set_index("ID").reindex(ids).reset_index()
+        names.append(candidate["strategy"])
+        columns.append(df["Pred"].to_numpy(dtype=np.float64))
+    if ids is None:
+        raise ValueError(f"No candidates listed in {run_dir / 'manifest.json'}")
+    return ids, names, np.column_stack(columns)
+
+
+def evaluate_run(run_dir: Path, input_dir: Path) -> pd.DataFrame:
+    """Score every candidate of a generate_daily_submission_candidates run and
+    add the scores to its manifest.json/manifest.csv. Returns the ranking."""
+    manifest_path = run_dir / "manifest.json"
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    ids, names, preds = _load_run_candidates(run_dir, manifest)
+
+    overall, by_group = brier_scores(ids, preds, load_outcomes(input_dir))
+    by_group["candidate"] = np.asarray(names, dtype=object)[by_group["candidate"].to_numpy(dtype=int)]
+    by_group.to_csv(run_dir / "brier_by_season.csv", index=False)
+
+    scores = {name: float(score) for name, score in zip(names, overall)}
+    games = int(by_group.drop_duplicates(["gender", "season"])["games"].sum()) if len(by_group) else 0
+    for key in ("candidates", "all_candidates"):
+        for candidate in manifest.get(key, []):
+            candidate["brier"] = scores.get(candidate["strategy"])
+    manifest["evaluation"] = {
+        "metric": "brier",
+        "scored_games": games,
+        "by_season_file": str(run_dir / "brier_by_season.csv"),
+    }
+    manifest_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+    manifest_csv = run_dir / "manifest.csv"
+    if manifest_csv.exists():
+        table = pd.read_csv(manifest_csv)
+        table["brier"] = table["strategy"].map(scores)
+        table.to_csv(manifest_csv, index=False)
+
+    ranking = pd.DataFrame({"strategy": names, "brier": overall}).sort_values("brier", kind="stable")
+    return ranking.reset_index(drop=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Score submission candidates with the Brier score.")
+    parser.add_argument("--run-dir", type=Path, required=True, help="A submissions/<date-tag> folder.")
+    parser.add_argument("--input-dir", type=Path, default=Path("input"))
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    ranking = evaluate_run(args.run_dir, args.input_dir)
+    if ranking["brier"].isna().all():
+        print("No candidate IDs match past tourney games; score a Stage 1 run instead.")
+        return
+    print(ranking.head(args.top).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
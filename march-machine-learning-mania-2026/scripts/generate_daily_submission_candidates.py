@@ -8,6 +8,7 @@ import json
 from dataclasses import dataclass, asdict
 from datetime import datetime
 from pathlib import Path
+from typing import Callable
 
 import numpy as np
 import pandas as pd
@@ -24,21 +25,199 @@ class CandidateStats:
     pred_max: float
 
 
-def _build_predictions(base: pd.Series, strategy: str, rng: np.random.Generator) -> np.ndarray:
-    x = base.to_numpy(dtype=float)
-    if strategy == "baseline_050":
-        preds = np.full_like(x, 0.50)
-    elif strategy == "constant_052":
-        preds = np.full_like(x, 0.52)
-    elif strategy == "constant_048":
-        preds = np.full_like(x, 0.48)
-    elif strategy == "jitter_sd002":
-        preds = 0.50 + rng.normal(0.0, 0.02, size=x.shape[0])
-    elif strategy == "jitter_sd005":
-        preds = 0.50 + rng.normal(0.0, 0.05, size=x.shape[0])
-    else:
+def parse_ids(ids: pd.Series | np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Split `Season_TeamA_TeamB` IDs into three int64 arrays."""
+    parts = pd.Series(ids).astype(str).str.split("_", n=2, expand=True)
+    if parts.shape[1] != 3:
+        raise ValueError("IDs must look like Season_TeamA_TeamB")
+    return tuple(parts[i].astype(np.int64).to_numpy() for i in range(3))
+
+
+class StrategyContext:
+    """What a strategy sees: the sample submission, the shared RNG, the competition
+    input folder and the other candidates."""
+
+    def __init__(
+        self, submission: pd.DataFrame, rng: np.random.Generator, input_dir: Path | None = None
+    ) -> None:
+        self.submission = submission
+        self.rng = rng
+        self.input_dir = input_dir
+        self.n_rows = int(submission.shape[0])
+        self._built: dict[str, np.ndarray] = {}
+        self._ratings: pd.DataFrame | None = None
+        self._ids: tuple[np.ndarray, np.ndarray, np.ndarray] | None = None
+
+    def ids(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Season, TeamA and TeamB of every submission row, parsed once."""
+        if self._ids is None:
+            self._ids = parse_ids(self.submission["ID"])
+        return self._ids
+
+    def ratings(self) -> pd.DataFrame:
+        """Per-season Elo/Massey ratings from ratings.py, computed once per run."""
+        if self._ratings is None:
+            if self.input_dir is None:
+                raise ValueError("Rating strategies need the competition input folder")
+            from ratings import compute_ratings
+
+            self._ratings = compute_ratings(self.input_dir)
+        return self._ratings
+
+    def resolve(self, name: str) -> np.ndarray:
+        """Clipped predictions of another strategy, built once and reused."""
+        if name not in self._built:
+            self._built[name] = _build_strategy(name, self)
+        return self._built[name]
+
+
+StrategyFn = Callable[[StrategyContext], np.ndarray]
+STRATEGIES: dict[str, StrategyFn] = {}
+DEFAULT_STRATEGIES = [
+    "baseline_050",
+    "constant_052",
+    "constant_048",
+    "jitter_sd002",
+    "jitter_sd005",
+]
+
+
+def register_strategy(name: str, fn: StrategyFn | None = None):
+    """Register fn under name; usable directly or as a decorator."""
+    if fn is None:
+        return lambda f: register_strategy(name, f)
+    if name in STRATEGIES:
+        raise ValueError(f"Strategy already registered: {name}")
+    STRATEGIES[name] = fn
+    return fn
+
+
+def constant_strategy(value: float) -> StrategyFn:
+    return lambda ctx: np.full(ctx.n_rows, value)
+
+
+def jitter_strategy(sd: float, seed: int | None = None) -> StrategyFn:
+    """Noise around 0.5; seed=None draws from the shared run RNG. A seeded
+    jitter draws from (seed, sd), so jitters of different sd never share their
+    normal draws and are not just rescaled (or shrunk) copies of each other."""
+
+    def build(ctx: StrategyContext) -> np.ndarray:
+        rng = ctx.rng if seed is None else np.random.default_rng(np.random.SeedSequence([seed, round(sd * 1000)]))
+        return 0.50 + rng.normal(0.0, sd, size=ctx.n_rows)
+
+    return build
+
+
+def shrink_strategy(base: str, weight: float) -> StrategyFn:
+    """Pull another candidate toward 0.5 by weight (0 = unchanged, 1 = all 0.5)."""
+    return lambda ctx: 0.50 + (1.0 - weight) * (ctx.resolve(base) - 0.50)
+
+
+def blend_strategy(bases: list[str], weights: list[float]) -> StrategyFn:
+    w = np.asarray(weights, dtype=float)
+    w = w / w.sum()
+
+    def build(ctx: StrategyContext) -> np.ndarray:
+        out = np.zeros(ctx.n_rows)
+        for name, weight in zip(bases, w):
+            out += weight * ctx.resolve(name)
+        return out
+
+    return build
+
+
+def rating_strategy(column: str) -> StrategyFn:
+    """Win probability of TeamA from the season's `elo` or `massey` ratings;
+    matchups with an unrated team stay at 0.5."""
+
+    def build(ctx: StrategyContext) -> np.ndarray:
+        from matchup_matrix import fill_predictions, matrices_from_ratings
+        from ratings import elo_probability, massey_probability
+
+        probability = {"elo": elo_probability, "massey": massey_probability}[column]
+        ids = ctx.ids()
+        return fill_predictions(ids, matrices_from_ratings(ctx.ratings(), column, probability, seasons=ids[0]))
+
+    return build
+
+
+register_strategy("baseline_050", constant_strategy(0.50))
+register_strategy("constant_052", constant_strategy(0.52))
+register_strategy("constant_048", constant_strategy(0.48))
+register_strategy("jitter_sd002", jitter_strategy(0.02))
+register_strategy("jitter_sd005", jitter_strategy(0.05))
+register_strategy("elo", rating_strategy("elo"))
+register_strategy("massey", rating_strategy("massey"))
+
+
+def register_variant_grid(
+    seeds: int,
+    jitter_sds: tuple[float, ...] = (0.01, 0.02, 0.03, 0.05),
+    shrink_weights: tuple[float, ...] = (0.25, 0.50),
+) -> list[str]:
+    """Register seeded jitter variants plus their shrunk versions; returns the new names."""
+    names: list[str] = []
+
+    def add(name: str, fn: StrategyFn) -> None:
+        if name not in STRATEGIES:
+            register_strategy(name, fn)
+        names.append(name)
+
+    for sd in jitter_sds:
+        for seed in range(seeds):
+            jitter_name = f"jitter_sd{round(sd * 1000):03d}_seed{seed}"
+            add(jitter_name, jitter_strategy(sd, seed))
+            for weight in shrink_weights:
+                add(f"shrink{round(weight * 100):03d}_{jitter_name}", shrink_strategy(jitter_name, weight))
+    return names
+
+
+def _build_strategy(strategy: str, ctx: StrategyContext) -> np.ndarray:
+    if strategy not in STRATEGIES:
         raise ValueError(f"Unknown strategy: {strategy}")
-    return np.clip(preds, 0.001, 0.999)
+    return np.clip(STRATEGIES[strategy](ctx), 0.001, 0.999)
+
+
+def build_prediction_matrix(
+    submission: pd.DataFrame,
+    strategies: list[str],
+    rng: np.random.Generator,
+    dtype: type = np.float32,
+    input_dir: Path | None = None,
+) -> np.ndarray:
+    """All candidates as one (rows, len(strategies)) matrix, built in a single pass.
+    float32 by default: the full variant grid is ~600 candidates of ~138k rows."""
+    ctx = StrategyContext(submission, rng, input_dir)
+    # column-major so each candidate is contiguous for the column-wise stats
+    matrix = np.empty((ctx.n_rows, len(strategies)), dtype=dtype, order="F")
+    for j, strategy in enumerate(strategies):
+        matrix[:, j] = ctx.resolve(strategy)
+        # later blends/shrinks read the stored column instead of a second copy
+        ctx._built[strategy] = matrix[:, j]
+    return matrix
+
+
+def _matrix_stats(matrix: np.ndarray) -> dict[str, np.ndarray]:
+    return {
+        "pred_mean": matrix.mean(axis=0, dtype=np.float64),
+        "pred_std": matrix.std(axis=0, ddof=1, dtype=np.float64),
+        "pred_min": matrix.min(axis=0),
+        "pred_max": matrix.max(axis=0),
+    }
+
+
+def save_candidate_store(path: Path, ids: pd.Series, strategies: list[str], matrix: np.ndarray) -> None:
+    np.savez(
+        path,
+        ids=ids.to_numpy(dtype=str),
+        strategies=np.asarray(strategies, dtype=str),
+        preds=matrix.astype(np.float32, copy=False),
+    )
+
+
+def load_candidate_store(path: Path) -> tuple[np.ndarray, list[str], np.ndarray]:
+    with np.load(path) as store:
+        return store["ids"], store["strategies"].tolist(), store["preds"]
 
 
 def generate_candidates(
@@ -47,6 +226,9 @@ def generate_candidates(
     date_tag: str,
     max_files: int,
     seed: int,
+    strategies: list[str] | None = None,
+    picks: list[str] | None = None,
+    input_dir: Path | None = None,
 ) -> list[CandidateStats]:
     if max_files < 1 or max_files > 5:
         raise ValueError("max_files must be between 1 and 5")
@@ -54,45 +236,60 @@ def generate_candidates(
     if "ID" not in df.columns or "Pred" not in df.columns:
         raise ValueError("Sample submission must contain ID and Pred columns")
 
-    strategies = [
-        "baseline_050",
-        "constant_052",
-        "constant_048",
-        "jitter_sd002",
-        "jitter_sd005",
-    ][:max_files]
+    strategies = list(DEFAULT_STRATEGIES[:max_files] if strategies is None else strategies)
+    picks = strategies[:max_files] if picks is None else picks
+    if len(picks) > max_files:
+        raise ValueError(f"Picked {len(picks)} candidates but max_files is {max_files}")
+    unknown = [name for name in picks if name not in strategies]
+    if unknown:
+        raise ValueError(f"Picked strategies are not candidates: {unknown}")
 
     run_dir = output_dir / date_tag
     run_dir.mkdir(parents=True, exist_ok=True)
     rng = np.random.default_rng(seed)
-    stats: list[CandidateStats] = []
+    if input_dir is None:
+        input_dir = sample_submission.parent
+    matrix = build_prediction_matrix(df, strategies, rng, input_dir=input_dir)
+    columns = _matrix_stats(matrix)
 
-    for i, strategy in enumerate(strategies, start=1):
+    files: dict[str, str] = {}
+    for i, strategy in enumerate(picks, start=1):
         out_df = df[["ID"]].copy()
-        out_df["Pred"] = _build_predictions(df["Pred"], strategy, rng)
+        out_df["Pred"] = matrix[:, strategies.index(strategy)]
         file_name = f"{date_tag}_sub{i:02d}_{strategy}.csv"
         out_path = run_dir / file_name
         out_df.to_csv(out_path, index=False, float_format="%.6f")
-        stats.append(
-            CandidateStats(
-                file=str(out_path),
-                strategy=strategy,
-                rows=int(out_df.shape[0]),
-                pred_mean=float(out_df["Pred"].mean()),
-                pred_std=float(out_df["Pred"].std()),
-                pred_min=float(out_df["Pred"].min()),
-                pred_max=float(out_df["Pred"].max()),
-            )
+        files[strategy] = str(out_path)
+
+    stats = [
+        CandidateStats(
+            file=files.get(strategy, ""),
+            strategy=strategy,
+            rows=int(matrix.shape[0]),
+            pred_mean=float(columns["pred_mean"][j]),
+            pred_std=float(columns["pred_std"][j]),
+            pred_min=float(columns["pred_min"][j]),
+            pred_max=float(columns["pred_max"][j]),
         )
+        for j, strategy in enumerate(strategies)
+    ]
+
+    store_path = run_dir / "candidates.npz"
+    if len(strategies) > len(picks):
+        save_candidate_store(store_path, df["ID"], strategies, matrix)
 
     manifest = {
         "generated_at_utc": datetime.utcnow().isoformat(timespec="seconds") + "Z",
         "source_sample_submission": str(sample_submission),
         "max_files": max_files,
         "seed": seed,
-        "candidates": [asdict(s) for s in stats],
+        "candidates": [asdict(s) for s in stats if s.file],
         "kaggle_submit_hint": "kaggle competitions submit -c march-machine-learning-mania-2026 -f <file.csv> -m \"note\"",
     }
+    if len(strategies) > len(picks):
+        # relative to the run folder, so the run can be evaluated from any cwd
+        manifest["candidate_store"] = store_path.name
+        manifest["all_candidates"] = [asdict(s) for s in stats]
     (run_dir / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
     pd.DataFrame([asdict(s) for s in stats]).to_csv(run_dir / "manifest.csv", index=False)
     return stats
@@ -106,6 +303,12 @@ def main() -> None:
         default=Path("input") / "SampleSubmissionStage2.csv",
     )
     parser.add_argument("--output-dir", type=Path, default=Path("submissions"))
+    parser.add_argument(
+        "--input-dir",
+        type=Path,
+        default=None,
+        help="Competition CSVs for the elo/massey strategies (default: the sample submission's folder).",
+    )
     parser.add_argument(
         "--date-tag",
         type=str,
@@ -114,16 +317,43 @@ def main() -> None:
     )
     parser.add_argument("--max-files", type=int, default=5)
     parser.add_argument("--seed", type=int, default=2026)
+    parser.add_argument(
+        "--strategies",
+        type=str,
+        default=None,
+        help="Comma-separated registered strategies to build (default: the first --max-files built-ins).",
+    )
+    parser.add_argument(
+        "--variant-seeds",
+        type=int,
+        default=0,
+        help="Also build seeded jitter variants (and their shrinkage toward 0.5) for this many seeds.",
+    )
+    parser.add_argument(
+        "--pick",
+        type=str,
+        default=None,
+        help="Comma-separated candidates to write as CSV (default: the first --max-files candidates).",
+    )
     args = parser.parse_args()
 
+    strategies = args.strategies.split(",") if args.strategies else None
+    if args.variant_seeds > 0:
+        strategies = (strategies or list(DEFAULT_STRATEGIES)) + register_variant_grid(args.variant_seeds)
     stats = generate_candidates(
         sample_submission=args.sample_submission,
         output_dir=args.output_dir,
         date_tag=args.date_tag,
         max_files=args.max_files,
         seed=args.seed,
+        strategies=strategies,
+        picks=args.pick.split(",") if args.pick else None,
+        input_dir=args.input_dir,
+    )
+    written = sum(1 for s in stats if s.file)
+    print(
+        f"Built {len(stats)} candidates, wrote {written} submission candidate files in {args.output_dir / args.date_tag}"
     )
-    print(f"Generated {len(stats)} submission candidate files in {args.output_dir / args.date_tag}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""Dense team x team win-probability matrices and fast submission filling."""
+
+from __future__ import annotations
+
+import argparse
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from generate_daily_submission_candidates import parse_ids
+
+ProbabilityFn = Callable[[np.ndarray, np.ndarray], np.ndarray]
+PairPredictFn = Callable[[np.ndarray], np.ndarray]
+
+
+def logistic_probability(score_a: np.ndarray, score_b: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-(score_a - score_b)))
+
+
+@dataclass
+class MatchupMatrix:
+    """probs[i, j] is the probability that team_ids[i] beats team_ids[j].
+
+    One matrix covers one gender and season (~380 teams, well under 1 MB as float32).
+    """
+
+    team_ids: np.ndarray
+    probs: np.ndarray
+
+    @classmethod
+    def from_ratings(
+        cls, team_ids: np.ndarray, ratings: np.ndarray, probability: ProbabilityFn = logistic_probability
+    ) -> "MatchupMatrix":
+        """Broadcast a per-team rating into every pairing at once."""
+        team_ids = np.asarray(team_ids, dtype=np.int64)
+        order = np.argsort(team_ids)
+        r = np.asarray(ratings, dtype=np.float64)[order]
+        probs = probability(r[:, None], r[None, :]).astype(np.float32)
+        return cls(team_ids=team_ids[order], probs=probs)
+
+    @classmethod
+    def from_features(
+        cls,
+        team_ids: np.ndarray,
+        features: np.ndarray,
+        predict: PairPredictFn,
+        block_rows: int = 64,
+    ) -> "MatchupMatrix":
+        """Score every pairing with a model on feature differences (TeamA - TeamB).
+
+        predict takes an (m, n_features) float32 array and returns m probabilities.
+        Rows of the matrix are built block_rows at a time to bound the
+        (block_rows * n_teams, n_features) difference array.
+        """
+        team_ids = np.asarray(team_ids, dtype=np.int64)
+        order = np.argsort(team_ids)
+        features = np.asarray(features, dtype=np.float32)[order]
+        n, k = features.shape
+        probs = np.empty((n, n), dtype=np.float32)
+        for start in range(0, n, block_rows):
+            block = features[start : start + block_rows]
+            diff = (block[:, None, :] - features[None, :, :]).reshape(-1, k)
+            probs[start : start + block.shape[0]] = np.asarray(predict(diff), dtype=np.float32).reshape(-1, n)
+        return cls(team_ids=team_ids[order], probs=probs)
+
+    def index(self, teams: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Row/column positions of teams and whether each team is in the matrix."""
+        pos = np.minimum(np.searchsorted(self.team_ids, teams), self.team_ids.size - 1)
+        return pos, self.team_ids[pos] == teams
+
+    def lookup(self, team_a: np.ndarray, team_b: np.ndarray, default: float = 0.5) -> np.ndarray:
+        pos_a, found_a = self.index(team_a)
+        pos_b, found_b = self.index(team_b)
+        return np.where(found_a & found_b, self.probs[pos_a, pos_b], np.float32(default))
+
+
+def matrices_from_ratings(
+    ratings: pd.DataFrame,
+    column: str,
+    probability: ProbabilityFn,
+    seasons: np.ndarray | None = None,
+) -> dict[tuple[str, int], MatchupMatrix]:
+    """One MatchupMatrix per (Gender, Season) of a ratings.compute_ratings frame."""
+    ratings = ratings.dropna(subset=[column])
+    if seasons is not None:
+        ratings = ratings[ratings["Season"].isin(np.unique(seasons))]
+    return {
+        (str(gender), int(season)): MatchupMatrix.from_ratings(
+            group["TeamID"].to_numpy(), group[column].to_numpy(), probability
+        )
+        for (gender, season), group in ratings.groupby(["Gender", "Season"], sort=True)
+    }
+
+
+def fill_predictions(
+    ids: pd.Series | np.ndarray | tuple[np.ndarray, np.ndarray, np.ndarray],
+    matrices: dict[tuple[str, int], MatchupMatrix],
+    default: float = 0.5,
+) -> np.ndarray:
+    """Pred for every `Season_TeamA_TeamB` ID by integer-indexing the season's matrices.
+
+    ids may also be the (season, team_a, team_b) arrays from parse_ids. A row
+    takes its value from whichever matrix of its season holds both teams (the
+    men's and women's TeamID ranges do not overlap); anything else gets default.
+    """
+    season, team_a, team_b = ids if isinstance(ids, tuple) else parse_ids(ids)
+    out = np.full(season.size, default, dtype=np.float64)
+
+    order = np.argsort(season, kind="stable")
+    sorted_season = season[order]
+    for (_, matrix_season), matrix in matrices.items():
+        lo, hi = np.searchsorted(sorted_season, [matrix_season, matrix_season + 1])
+        if lo == hi:
+            continue
+        rows = order[lo:hi]
+        pos_a, found_a = matrix.index(team_a[rows])
+        pos_b, found_b = matrix.index(team_b[rows])
+        hit = found_a & found_b
+        out[rows[hit]] = matrix.probs[pos_a[hit], pos_b[hit]]
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fill a sample submission from Elo or Massey matchup matrices.")
+    parser.add_argument("--input-dir", type=Path, default=Path("input"))
+    parser.add_argument(
+        "--sample-submission",
+        type=Path,
+        default=Path("input") / "SampleSubmissionStage2.csv",
+    )
+    parser.add_argument("--rating", choices=["elo", "massey"], default="elo")
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    from ratings import compute_ratings, elo_probability, massey_probability
+
+    ratings = compute_ratings(args.input_dir)
+    submission = pd.read_csv(args.sample_submission)
+
+    started = time.perf_counter()
+    ids = parse_ids(submission["ID"])
+    probability = {"elo": elo_probability, "massey": massey_probability}[args.rating]
+    matrices = matrices_from_ratings(ratings, args.rating, probability, seasons=ids[0])
+    submission["Pred"] = np.clip(fill_predictions(ids, matrices), 0.001, 0.999)
+    elapsed = time.perf_counter() - started
+
+    output = args.output or Path("submissions") / f"{args.rating}_matrix.csv"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    submission.to_csv(output, index=False)
+    print(f"Filled {len(submission):,} rows from {len(matrices)} matrices in {elapsed:.3f}s -> {output}")
+
+
+if __name__ == "__main__":
+    main()
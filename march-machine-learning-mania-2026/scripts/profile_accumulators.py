@@ -0,0 +1,267 @@
+"""Mergeable, bounded-memory accumulators for chunked CSV profiling."""
+
+from __future__ import annotations
+
+import math
+import tempfile
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+# every null hashes to this value, whatever dtype its chunk was inferred as
+NULL_HASH = np.uint64(0x9E3779B97F4A7C15)
+ROW_HASH_MULTIPLIER = np.uint64(0x100000001B3)
+NULL_TEXT = "<NA>"
+
+
+def value_text(series: pd.Series) -> pd.Series:
+    """Each value as the text it most likely had in the CSV, so that a chunk
+    read as int64, one read as float64 (it holds a null) and one read as object
+    (it holds a non-number) give the same string for the same cell. Integral
+    floats print as integers ("1", not "1.0"); nulls stay <NA>.
+    """
+    text = series.astype("string")
+    if pd.api.types.is_float_dtype(series):
+        values = series.to_numpy(dtype=np.float64)
+        with np.errstate(invalid="ignore"):
+            integral = np.isfinite(values) & (values == np.floor(values)) & (np.abs(values) < 2.0**63)
+        if integral.any():
+            text[integral] = values[integral].astype(np.int64).astype(str)
+    return text
+
+
+def value_hashes(series: pd.Series) -> np.ndarray:
+    """64-bit hash of value_text, the same for a cell whatever dtype pandas
+    inferred for its chunk."""
+    hashes = pd.util.hash_pandas_object(value_text(series), index=False).to_numpy(dtype=np.uint64).copy()
+    hashes[series.isna().to_numpy()] = NULL_HASH
+    return hashes
+
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """One 64-bit hash per row, combined from value_hashes of every column."""
+    hashes = np.zeros(len(df), dtype=np.uint64)
+    for col in df.columns:
+        # uint64 arithmetic wraps around, like an FNV-style combine
+        hashes = (hashes * ROW_HASH_MULTIPLIER) ^ value_hashes(df[col])
+    return hashes
+
+
+class NumericMoments:
+    """Count, min, max, mean and sample std merged chunk by chunk (Chan/Welford)."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min: float | None = None
+        self.max: float | None = None
+
+    def update(self, values: np.ndarray) -> None:
+        values = values[~np.isnan(values)]
+        n_b = int(values.size)
+        if n_b == 0:
+            return
+        mean_b = float(values.mean())
+        m2_b = float(((values - mean_b) ** 2).sum())
+        n_a = self.count
+        n = n_a + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self.m2 += m2_b + delta * delta * n_a * n_b / n
+        self.count = n
+
+        chunk_min, chunk_max = float(values.min()), float(values.max())
+        self.min = chunk_min if self.min is None else min(self.min, chunk_min)
+        self.max = chunk_max if self.max is None else max(self.max, chunk_max)
+
+    def stats(self) -> dict[str, float | None]:
+        return {
+            "min": self.min,
+            "max": self.max,
+            "mean": self.mean if self.count else None,
+            "std": math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else None,
+        }
+
+
+class HyperLogLog:
+    """Distinct-count sketch over 64-bit hashes; ~0.8% standard error at p=14."""
+
+    def __init__(self, p: int = 14) -> None:
+        self.p = p
+        self.m = 1 << p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def add_hashes(self, hashes: np.ndarray) -> None:
+        if hashes.size == 0:
+            return
+        hashes = hashes.astype(np.uint64, copy=False)
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        # the remaining 64 - p bits fit a float64 exactly, so log2 finds the top set bit
+        rest_bits = 64 - self.p
+        rest = (hashes & np.uint64((1 << rest_bits) - 1)).astype(np.float64)
+        with np.errstate(divide="ignore"):
+            top_bit = np.floor(np.log2(rest))
+        rank = np.where(rest > 0, rest_bits - top_bit, rest_bits + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def count(self) -> int:
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m * self.m / float(np.sum(np.exp2(-self.registers.astype(np.float64))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * self.m and zeros:
+            estimate = self.m * math.log(self.m / zeros)
+        return int(round(estimate))
+
+
+class DistinctCounter:
+    """Exact distinct count over value hashes until exact_limit, then a HyperLogLog sketch."""
+
+    def __init__(self, exact_limit: int = 65536) -> None:
+        self.exact_limit = exact_limit
+        self.hashes: np.ndarray | None = np.empty(0, dtype=np.uint64)
+        self.sketch = HyperLogLog()
+
+    @property
+    def is_exact(self) -> bool:
+        return self.hashes is not None
+
+    def add_hashes(self, hashes: np.ndarray) -> None:
+        self.sketch.add_hashes(hashes)
+        if self.hashes is not None:
+            self.hashes = np.union1d(self.hashes, hashes.astype(np.uint64, copy=False))
+            if self.hashes.size > self.exact_limit:
+                self.hashes = None
+
+    def count(self) -> int:
+        return int(self.hashes.size) if self.hashes is not None else self.sketch.count()
+
+
+class HeavyHitters:
+    """Misra-Gries summary; every count is a lower bound off by at most n / (capacity + 1)."""
+
+    def __init__(self, capacity: int = 4096) -> None:
+        self.capacity = capacity
+        self.counts = pd.Series(dtype="int64")
+        self.truncated = False
+
+    def update(self, value_counts: pd.Series) -> None:
+        merged = self.counts.add(value_counts.astype("int64"), fill_value=0).astype("int64")
+        if len(merged) > self.capacity:
+            threshold = int(merged.nlargest(self.capacity + 1).iloc[-1])
+            merged = merged - threshold
+            merged = merged[merged > 0]
+            self.truncated = True
+        self.counts = merged
+
+    def top(self, k: int = 5) -> dict[str, int]:
+        return {str(key): int(value) for key, value in self.counts.nlargest(k).items()}
+
+
+class ColumnAccumulator:
+    def __init__(self) -> None:
+        self.rows = 0
+        self.null_count = 0
+        self.dtypes: list[str] = []
+        self.numeric = NumericMoments()
+        self.distinct = DistinctCounter()
+        self.top_values = HeavyHitters()
+        self.saw_numeric_values = False
+        self.saw_non_numeric = False
+
+    def update(self, series: pd.Series) -> None:
+        self.rows += len(series)
+        self.null_count += int(series.isna().sum())
+        if str(series.dtype) not in self.dtypes:
+            self.dtypes.append(str(series.dtype))
+
+        # every chunk is hashed and counted as text, whatever its dtype, so the
+        # result does not depend on where the chunk boundaries fall
+        text = value_text(series)
+        self.distinct.add_hashes(value_hashes(series.dropna()))
+        self.top_values.update(text.fillna(NULL_TEXT).value_counts(dropna=False))
+        has_values = bool(series.notna().any())
+        if pd.api.types.is_numeric_dtype(series):
+            self.numeric.update(series.dropna().to_numpy(dtype=np.float64))
+            if has_values and not pd.api.types.is_bool_dtype(series):
+                self.saw_numeric_values = True
+        else:
+            self.saw_non_numeric = True
+
+    @property
+    def mixed_types(self) -> bool:
+        """True when numbers and text chunks were mixed. A full read keeps such a
+        column as text, e.g. "01" or "1.50", which a numeric chunk reads as 1 or
+        1.5, so distinct counts, top values and duplicate rows are estimates.
+        """
+        return self.saw_numeric_values and self.saw_non_numeric
+
+    def _dtype(self) -> str:
+        # chunks can infer different dtypes, e.g. int64 until a chunk with nulls
+        if len(self.dtypes) == 1:
+            return self.dtypes[0]
+        try:
+            dtypes = [np.dtype(d) for d in self.dtypes]
+        except TypeError:
+            return "object"
+        if all(np.issubdtype(d, np.number) or d == np.bool_ for d in dtypes):
+            return str(np.result_type(*dtypes))
+        return "object"
+
+    def profile(self) -> dict[str, Any]:
+        dtype = self._dtype()
+        non_null = self.rows - self.null_count
+        out: dict[str, Any] = {
+            "dtype": dtype,
+            "non_null": non_null,
+            "null_count": self.null_count,
+            "null_pct": round(self.null_count / max(self.rows, 1) * 100, 4),
+            "nunique_non_null": min(self.distinct.count(), non_null),
+        }
+        approximate = [] if self.distinct.is_exact and not self.mixed_types else ["nunique_non_null"]
+        if not self.saw_non_numeric:
+            out["numeric_stats"] = self.numeric.stats()
+        else:
+            out["top_values"] = self.top_values.top(5)
+            if self.top_values.truncated or self.mixed_types:
+                approximate.append("top_values")
+        out["approximate"] = approximate
+        return out
+
+
+class RowHashSpill:
+    """Exact (up to 64-bit hash collisions) duplicate-row counting with bounded memory.
+
+    Row hashes are spilled to 256 bucket files keyed on their top byte, so the
+    final pass only ever holds one bucket (~1/256 of the hashes) in memory.
+    """
+
+    n_buckets = 256
+
+    def __init__(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory(prefix="profile_rows_")
+        self._paths = [Path(self._tmp.name) / f"{i:03d}.u64" for i in range(self.n_buckets)]
+
+    def add_frame(self, df: pd.DataFrame) -> None:
+        hashes = row_hashes(df)
+        buckets = (hashes >> np.uint64(56)).astype(np.int64)
+        order = np.argsort(buckets, kind="stable")
+        hashes, buckets = hashes[order], buckets[order]
+        bounds = np.searchsorted(buckets, np.arange(self.n_buckets + 1))
+        for bucket in np.flatnonzero(np.diff(bounds)):
+            with open(self._paths[bucket], "ab") as f_out:
+                hashes[bounds[bucket] : bounds[bucket + 1]].tofile(f_out)
+
+    def duplicate_rows(self) -> int:
+        duplicates = 0
+        for path in self._paths:
+            if not path.exists():
+                continue
+            hashes = np.fromfile(path, dtype=np.uint64)
+            duplicates += int(hashes.size - np.unique(hashes).size)
+        return duplicates
+
+    def close(self) -> None:
+        self._tmp.cleanup()
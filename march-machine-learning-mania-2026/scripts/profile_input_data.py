@@ -4,13 +4,18 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
+import tempfile
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
 from dataclasses import asdict, dataclass
 from pathlib import Path
 from typing import Any
 
 import pandas as pd
 
+from profile_accumulators import ColumnAccumulator, RowHashSpill
+
 
 @dataclass
 class FileSummary:
@@ -23,6 +28,7 @@ class FileSummary:
     memory_mb: float
     min_season: int | None
     max_season: int | None
+    profile_mode: str = "exact"
 
 
 def _float_or_none(value: Any) -> float | None:
@@ -95,6 +101,15 @@ def _build_notes(
             f"- `{Path(fs.file).name}`: {fs.rows:,} rows, {fs.columns} cols, missing={fs.missing_pct:.2f}%"
         )
 
+    streamed = [s for s in summaries if s.profile_mode == "streaming"]
+    if streamed:
+        lines.extend(
+            [
+                "",
+                f"- Streamed (chunked) files: **{len(streamed)}**; memory and any fields listed under `approximate_fields` are estimates.",
+            ]
+        )
+
     lines.extend(["", "## Quick quality flags"])
     for fs in summaries:
         flags: list[str] = []
@@ -142,53 +157,314 @@ def _build_notes(
     (reports_dir / "data_profile_notes.md").write_text("\n".join(lines), encoding="utf-8")
 
 
-def profile_csvs(input_dir: Path, reports_dir: Path, preview_rows: int) -> None:
+def _profile_frame(df: pd.DataFrame, file_name: str, preview_rows: int) -> tuple[FileSummary, dict[str, Any]]:
+    rows, cols = df.shape
+    missing_cells = int(df.isna().sum().sum())
+    missing_pct = round(missing_cells / max(rows * cols, 1) * 100, 4)
+    duplicate_rows = int(df.duplicated().sum())
+    memory_mb = round(float(df.memory_usage(deep=True).sum()) / (1024 * 1024), 3)
+    min_season = _int_or_none(df["Season"].min()) if "Season" in df.columns else None
+    max_season = _int_or_none(df["Season"].max()) if "Season" in df.columns else None
+
+    summary = FileSummary(
+        file=file_name,
+        rows=rows,
+        columns=cols,
+        duplicate_rows=duplicate_rows,
+        missing_cells=missing_cells,
+        missing_pct=missing_pct,
+        memory_mb=memory_mb,
+        min_season=min_season,
+        max_season=max_season,
+    )
+    detail = {
+        "file": file_name,
+        "shape": {"rows": rows, "columns": cols},
+        "columns": list(df.columns),
+        "duplicate_rows": duplicate_rows,
+        "missing_cells": missing_cells,
+        "missing_pct": missing_pct,
+        "memory_mb": memory_mb,
+        "season_range": {"min": min_season, "max": max_season},
+        "column_profiles": {},
+        "preview_rows": df.head(preview_rows).to_dict(orient="records"),
+        "profile_mode": "exact",
+    }
+    return summary, detail
+
+
+def _profile_file(csv_path: Path, preview_rows: int) -> tuple[FileSummary, dict[str, Any]]:
+    df = pd.read_csv(csv_path, low_memory=False)
+    summary, detail = _profile_frame(df, csv_path.name, preview_rows)
+    detail["column_profiles"] = {col: _column_profile(df[col]) for col in df.columns}
+    return summary, detail
+
+
+def _profile_file_streaming(
+    csv_path: Path, preview_rows: int, chunksize: int
+) -> tuple[FileSummary, dict[str, Any]]:
+    """Profile a CSV chunk by chunk so peak memory follows chunksize, not file size.
+
+    Counts, nulls, min/max/mean/std and season range are exact; duplicate rows are
+    exact up to 64-bit hash collisions. Memory is the sum over chunks. Distinct
+    counts switch to HyperLogLog past 65,536 values and top values to a Misra-Gries
+    summary past 4,096; columns where that happened list the field under "approximate".
+    So do columns whose chunks mixed numbers and text (duplicate rows too), as a
+    numeric chunk no longer has the exact text of its cells.
+    """
+    columns: list[str] = []
+    accumulators: dict[str, ColumnAccumulator] = {}
+    row_hashes = RowHashSpill()
+    preview: list[dict[str, Any]] = []
+    rows = 0
+    memory_bytes = 0.0
+    try:
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize, low_memory=False):
+            if not columns:
+                columns = list(chunk.columns)
+                accumulators = {col: ColumnAccumulator() for col in columns}
+            if len(preview) < preview_rows:
+                preview.extend(chunk.head(preview_rows - len(preview)).to_dict(orient="records"))
+            rows += len(chunk)
+            memory_bytes += float(chunk.memory_usage(deep=True).sum())
+            row_hashes.add_frame(chunk)
+            for col in columns:
+                accumulators[col].update(chunk[col])
+        duplicate_rows = row_hashes.duplicate_rows()
+    finally:
+        row_hashes.close()
+
+    if not columns:
+        columns = list(pd.read_csv(csv_path, nrows=0).columns)
+        accumulators = {col: ColumnAccumulator() for col in columns}
+    column_profiles = {col: accumulators[col].profile() for col in columns}
+    cols = len(columns)
+    missing_cells = sum(acc.null_count for acc in accumulators.values())
+    missing_pct = round(missing_cells / max(rows * cols, 1) * 100, 4)
+    memory_mb = round(memory_bytes / (1024 * 1024), 3)
+    season_stats = column_profiles.get("Season", {}).get("numeric_stats", {})
+    min_season = _int_or_none(season_stats.get("min", float("nan")))
+    max_season = _int_or_none(season_stats.get("max", float("nan")))
+
+    summary = FileSummary(
+        file=csv_path.name,
+        rows=rows,
+        columns=cols,
+        duplicate_rows=duplicate_rows,
+        missing_cells=missing_cells,
+        missing_pct=missing_pct,
+        memory_mb=memory_mb,
+        min_season=min_season,
+        max_season=max_season,
+        profile_mode="streaming",
+    )
+    detail = {
+        "file": csv_path.name,
+        "shape": {"rows": rows, "columns": cols},
+        "columns": columns,
+        "duplicate_rows": duplicate_rows,
+        "missing_cells": missing_cells,
+        "missing_pct": missing_pct,
+        "memory_mb": memory_mb,
+        "season_range": {"min": min_season, "max": max_season},
+        "column_profiles": column_profiles,
+        "preview_rows": preview,
+        "profile_mode": "streaming",
+        "approximate_fields": ["memory_mb"]
+        + (["duplicate_rows"] if any(acc.mixed_types for acc in accumulators.values()) else [])
+        + [
+            f"column_profiles.{col}.{field}"
+            for col, profile in column_profiles.items()
+            for field in profile["approximate"]
+        ],
+    }
+    return summary, detail
+
+
+def _profile_file_split(
+    csv_path: Path, preview_rows: int, parts: int, spill_dir: Path
+) -> tuple[FileSummary, dict[str, Any], list[Path]]:
+    """Parse csv_path once, profile the frame and pickle its columns in up to
+    `parts` groups under spill_dir for _profile_columns tasks to pick up."""
+    df = pd.read_csv(csv_path, low_memory=False)
+    summary, detail = _profile_frame(df, csv_path.name, preview_rows)
+    frame_paths = []
+    for i, columns in enumerate(_chunk_columns(list(df.columns), parts)):
+        # pickle keeps the parsed dtypes (mixed object columns included) exactly
+        frame_path = spill_dir / f"{csv_path.name}.{i:03d}.pkl"
+        df[columns].to_pickle(frame_path)
+        frame_paths.append(frame_path)
+    return summary, detail, frame_paths
+
+
+def _profile_columns(frame_path: Path) -> dict[str, Any]:
+    df = pd.read_pickle(frame_path)
+    frame_path.unlink()
+    return {col: _column_profile(df[col]) for col in df.columns}
+
+
+def _chunk_columns(columns: list[str], parts: int) -> list[list[str]]:
+    size = max(1, -(-len(columns) // parts))
+    return [columns[i : i + size] for i in range(0, len(columns), size)]
+
+
+def _profile_parallel(
+    csv_paths: list[Path],
+    preview_rows: int,
+    workers: int,
+    split_columns_mb: float,
+    chunksize: int | None = None,
+) -> list[tuple[FileSummary, dict[str, Any]]]:
+    """Profile files concurrently; files of at least split_columns_mb are parsed
+    once and their columns profiled in separate tasks. Results come back in
+    csv_paths order."""
+    with tempfile.TemporaryDirectory(prefix="profile_columns_") as spill_dir, ProcessPoolExecutor(
+        max_workers=workers
+    ) as pool:
+        if chunksize is not None:
+            futures = [
+                pool.submit(_profile_file_streaming, csv_path, preview_rows, chunksize)
+                for csv_path in csv_paths
+            ]
+            return [future.result() for future in futures]
+
+        file_futures: list[Future] = []
+        for csv_path in csv_paths:
+            if csv_path.stat().st_size >= split_columns_mb * 1024 * 1024:
+                file_futures.append(
+                    pool.submit(_profile_file_split, csv_path, preview_rows, workers, Path(spill_dir))
+                )
+            else:
+                file_futures.append(pool.submit(_profile_file, csv_path, preview_rows))
+
+        # column tasks of a split file start as soon as its single parse is done
+        column_futures: dict[Future, list[Future]] = {}
+        for future in as_completed(file_futures):
+            result = future.result()
+            if len(result) == 3:
+                column_futures[future] = [pool.submit(_profile_columns, path) for path in result[2]]
+
+        results = []
+        for future in file_futures:
+            summary, detail = future.result()[:2]
+            if future in column_futures:
+                merged: dict[str, Any] = {}
+                for column_future in column_futures[future]:
+                    merged.update(column_future.result())
+                detail["column_profiles"] = {col: merged[col] for col in detail["columns"]}
+            results.append((summary, detail))
+    return results
+
+
+def file_fingerprint(csv_path: Path, method: str) -> dict[str, Any]:
+    stat = csv_path.stat()
+    fingerprint: dict[str, Any] = {"size": stat.st_size}
+    if method == "sha256":
+        digest = hashlib.sha256()
+        with csv_path.open("rb") as f_in:
+            for block in iter(lambda: f_in.read(1024 * 1024), b""):
+                digest.update(block)
+        fingerprint["sha256"] = digest.hexdigest()
+    elif method == "stat":
+        fingerprint["mtime_ns"] = stat.st_mtime_ns
+    else:
+        raise ValueError(f"Unknown fingerprint method: {method}")
+    return fingerprint
+
+
+def _load_cached_profile(
+    cache_dir: Path, csv_path: Path, key: dict[str, Any]
+) -> tuple[FileSummary, dict[str, Any]] | None:
+    cache_path = cache_dir / f"{csv_path.name}.json"
+    if not cache_path.exists():
+        return None
+    try:
+        entry = json.loads(cache_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if entry.get("key") != key:
+        return None
+    return FileSummary(**entry["summary"]), entry["detail"]
+
+
+def _store_cached_profile(
+    cache_dir: Path,
+    csv_path: Path,
+    key: dict[str, Any],
+    result: tuple[FileSummary, dict[str, Any]],
+) -> None:
+    summary, detail = result
+    entry = {"key": key, "summary": asdict(summary), "detail": detail}
+    (cache_dir / f"{csv_path.name}.json").write_text(json.dumps(entry), encoding="utf-8")
+
+
+def _profile_paths(
+    csv_paths: list[Path],
+    preview_rows: int,
+    workers: int,
+    split_columns_mb: float,
+    chunksize: int | None,
+) -> list[tuple[FileSummary, dict[str, Any]]]:
+    if not csv_paths:
+        return []
+    if workers > 1:
+        return _profile_parallel(csv_paths, preview_rows, workers, split_columns_mb, chunksize)
+    if chunksize is not None:
+        return [_profile_file_streaming(csv_path, preview_rows, chunksize) for csv_path in csv_paths]
+    return [_profile_file(csv_path, preview_rows) for csv_path in csv_paths]
+
+
+def profile_csvs(
+    input_dir: Path,
+    reports_dir: Path,
+    preview_rows: int,
+    workers: int = 1,
+    split_columns_mb: float = 64.0,
+    chunksize: int | None = None,
+    use_cache: bool = True,
+    fingerprint: str = "stat",
+) -> tuple[int, int]:
+    """Write the profile reports and return (profiled, reused): the number of
+    files profiled in this run and the number taken from the cache."""
     reports_dir.mkdir(parents=True, exist_ok=True)
     csv_paths = sorted(input_dir.glob("*.csv"))
     if not csv_paths:
         raise FileNotFoundError(f"No CSV files found in {input_dir}")
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    if chunksize is not None and chunksize < 1:
+        raise ValueError("chunksize must be at least 1")
 
-    summaries: list[FileSummary] = []
-    details: dict[str, Any] = {}
-
-    for csv_path in csv_paths:
-        df = pd.read_csv(csv_path, low_memory=False)
-        file_name = csv_path.name
-        rows, cols = df.shape
-        missing_cells = int(df.isna().sum().sum())
-        missing_pct = round(missing_cells / max(rows * cols, 1) * 100, 4)
-        duplicate_rows = int(df.duplicated().sum())
-        memory_mb = round(float(df.memory_usage(deep=True).sum()) / (1024 * 1024), 3)
-        min_season = _int_or_none(df["Season"].min()) if "Season" in df.columns else None
-        max_season = _int_or_none(df["Season"].max()) if "Season" in df.columns else None
-
-        summaries.append(
-            FileSummary(
-                file=file_name,
-                rows=rows,
-                columns=cols,
-                duplicate_rows=duplicate_rows,
-                missing_cells=missing_cells,
-                missing_pct=missing_pct,
-                memory_mb=memory_mb,
-                min_season=min_season,
-                max_season=max_season,
-            )
-        )
+    # A cached entry is reused only when the file and every setting that shapes
+    # its profile (preview rows, streaming chunk size) are unchanged.
+    cache_dir = reports_dir / "profile_cache"
+    keys = {}
+    cached: dict[Path, tuple[FileSummary, dict[str, Any]]] = {}
+    if use_cache:
+        cache_dir.mkdir(exist_ok=True)
+        for csv_path in csv_paths:
+            keys[csv_path] = {
+                "fingerprint": file_fingerprint(csv_path, fingerprint),
+                "preview_rows": preview_rows,
+                "chunksize": chunksize,
+            }
+            hit = _load_cached_profile(cache_dir, csv_path, keys[csv_path])
+            if hit is not None:
+                cached[csv_path] = hit
 
-        column_profiles = {col: _column_profile(df[col]) for col in df.columns}
-        details[file_name] = {
-            "file": file_name,
-            "shape": {"rows": rows, "columns": cols},
-            "columns": list(df.columns),
-            "duplicate_rows": duplicate_rows,
-            "missing_cells": missing_cells,
-            "missing_pct": missing_pct,
-            "memory_mb": memory_mb,
-            "season_range": {"min": min_season, "max": max_season},
-            "column_profiles": column_profiles,
-            "preview_rows": df.head(preview_rows).to_dict(orient="records"),
-        }
+    stale = [csv_path for csv_path in csv_paths if csv_path not in cached]
+    fresh = dict(zip(stale, _profile_paths(stale, preview_rows, workers, split_columns_mb, chunksize)))
+    if use_cache:
+        for csv_path, result in fresh.items():
+            _store_cached_profile(cache_dir, csv_path, keys[csv_path], result)
+        current = {f"{csv_path.name}.json" for csv_path in csv_paths}
+        for cache_path in cache_dir.glob("*.json"):
+            if cache_path.name not in current:
+                cache_path.unlink()
+
+    results = [cached[csv_path] if csv_path in cached else fresh[csv_path] for csv_path in csv_paths]
+    summaries: list[FileSummary] = [summary for summary, _ in results]
+    details: dict[str, Any] = {detail["file"]: detail for _, detail in results}
 
     summary_df = pd.DataFrame([asdict(s) for s in summaries]).sort_values("file")
     summary_df.to_csv(reports_dir / "data_profile_summary.csv", index=False)
@@ -196,6 +472,7 @@ def profile_csvs(input_dir: Path, reports_dir: Path, preview_rows: int) -> None:
         json.dumps(details, indent=2), encoding="utf-8"
     )
     _build_notes(summaries, details, reports_dir)
+    return len(stale), len(cached)
 
 
 def main() -> None:
@@ -203,8 +480,47 @@ def main() -> None:
     parser.add_argument("--input-dir", type=Path, default=Path("input"))
     parser.add_argument("--reports-dir", type=Path, default=Path("reports"))
     parser.add_argument("--preview-rows", type=int, default=5)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes used to profile files (and the columns of large files) in parallel.",
+    )
+    parser.add_argument(
+        "--split-columns-mb",
+        type=float,
+        default=64.0,
+        help="With --workers > 1, files at least this large are parsed once and their columns profiled in parallel.",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=None,
+        help="Stream each CSV in chunks of this many rows (bounded memory, some fields approximate).",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Reprofile every file instead of reusing unchanged entries from <reports-dir>/profile_cache.",
+    )
+    parser.add_argument(
+        "--fingerprint",
+        choices=["stat", "sha256"],
+        default="stat",
+        help="How unchanged files are detected: size+mtime (fast) or a content hash.",
+    )
     args = parser.parse_args()
-    profile_csvs(args.input_dir, args.reports_dir, args.preview_rows)
+    profiled, reused = profile_csvs(
+        args.input_dir,
+        args.reports_dir,
+        args.preview_rows,
+        workers=args.workers,
+        split_columns_mb=args.split_columns_mb,
+        chunksize=args.chunksize,
+        use_cache=not args.no_cache,
+        fingerprint=args.fingerprint,
+    )
+    print(f"Profiled {profiled} changed file(s), reused {reused} cached profile(s)")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""Per-(season, team) box-score aggregates with an on-disk Feather cache."""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from profile_input_data import file_fingerprint
+
+GENDERS = ("M", "W")
+FEATURE_VERSION = 1
+RECENT_GAMES = 10
+BOX_STATS = ["Score", "FGM", "FGA", "FGM3", "FGA3", "FTM", "FTA", "OR", "DR", "Ast", "TO", "Stl", "Blk", "PF"]
+DEFAULT_CACHE_DIR = Path("reports") / "feature_cache"
+
+
+def detailed_results_path(input_dir: Path, gender: str) -> Path:
+    return input_dir / f"{gender}RegularSeasonDetailedResults.csv"
+
+
+def team_games(detailed: pd.DataFrame) -> pd.DataFrame:
+    """Every game twice, once from each team's side: own box score plus Opp* columns."""
+    n_games = len(detailed)
+
+    def both_sides(winner_col: str, loser_col: str) -> np.ndarray:
+        return np.concatenate([detailed[winner_col].to_numpy(), detailed[loser_col].to_numpy()])
+
+    wloc = detailed["WLoc"].to_numpy(dtype=str)
+    home = np.select([wloc == "H", wloc == "A"], [1, -1], 0).astype(np.int8)
+    games = {
+        "Season": np.tile(detailed["Season"].to_numpy(), 2),
+        "DayNum": np.tile(detailed["DayNum"].to_numpy(), 2),
+        "TeamID": both_sides("WTeamID", "LTeamID"),
+        "OppTeamID": both_sides("LTeamID", "WTeamID"),
+        "Win": np.r_[np.ones(n_games, dtype=np.int8), np.zeros(n_games, dtype=np.int8)],
+        "Home": np.r_[home, -home],
+        "NumOT": np.tile(detailed["NumOT"].to_numpy(), 2),
+    }
+    for stat in BOX_STATS:
+        games[stat] = both_sides(f"W{stat}", f"L{stat}").astype(np.float64)
+        games[f"Opp{stat}"] = both_sides(f"L{stat}", f"W{stat}").astype(np.float64)
+    return pd.DataFrame(games)
+
+
+def _possessions(fga, orb, to, fta):
+    return fga - orb + to + 0.475 * fta
+
+
+def season_aggregates(detailed: pd.DataFrame, recent_games: int = RECENT_GAMES) -> pd.DataFrame:
+    """Efficiency, pace, four factors and last-N-games form for every (Season, TeamID)."""
+    games = team_games(detailed).sort_values(["Season", "TeamID", "DayNum"], kind="stable", ignore_index=True)
+    own_poss = _possessions(games["FGA"], games["OR"], games["TO"], games["FTA"])
+    opp_poss = _possessions(games["OppFGA"], games["OppOR"], games["OppTO"], games["OppFTA"])
+    games["Poss"] = 0.5 * (own_poss + opp_poss)
+    games["Minutes"] = 40.0 + 5.0 * games["NumOT"]
+    games["Margin"] = games["Score"] - games["OppScore"]
+
+    keys = ["Season", "TeamID"]
+    sums = games.drop(columns=["OppTeamID", "DayNum", "Home", "NumOT"]).groupby(keys, sort=True).sum()
+    n_played = games.groupby(keys, sort=True).size()
+
+    recent = games[games.groupby(keys, sort=False).cumcount(ascending=False) < recent_games]
+    recent_sums = recent.groupby(keys, sort=True)[["Win", "Margin", "Poss"]].sum()
+    recent_count = recent.groupby(keys, sort=True).size()
+
+    s = sums
+    features = pd.DataFrame(
+        {
+            "games": n_played,
+            "win_pct": s["Win"] / n_played,
+            "avg_margin": s["Margin"] / n_played,
+            "pace": 40.0 * s["Poss"] / s["Minutes"],
+            "off_eff": 100.0 * s["Score"] / s["Poss"],
+            "def_eff": 100.0 * s["OppScore"] / s["Poss"],
+            "efg_pct": (s["FGM"] + 0.5 * s["FGM3"]) / s["FGA"],
+            "tov_pct": s["TO"] / _possessions(s["FGA"], s["OR"], s["TO"], s["FTA"]),
+            "orb_pct": s["OR"] / (s["OR"] + s["OppDR"]),
+            "ft_rate": s["FTM"] / s["FGA"],
+            "opp_efg_pct": (s["OppFGM"] + 0.5 * s["OppFGM3"]) / s["OppFGA"],
+            "opp_tov_pct": s["OppTO"] / _possessions(s["OppFGA"], s["OppOR"], s["OppTO"], s["OppFTA"]),
+            "drb_pct": s["DR"] / (s["DR"] + s["OppOR"]),
+            "opp_ft_rate": s["OppFTM"] / s["OppFGA"],
+            "fg3_rate": s["FGA3"] / s["FGA"],
+            "ast_rate": s["Ast"] / s["FGM"],
+            "recent_win_pct": recent_sums["Win"] / recent_count,
+            "recent_margin": recent_sums["Margin"] / recent_count,
+            "recent_net_eff": 100.0 * recent_sums["Margin"] / recent_sums["Poss"],
+        }
+    )
+    features.insert(features.columns.get_loc("def_eff") + 1, "net_eff", features["off_eff"] - features["def_eff"])
+
+    features = features.astype(np.float32)
+    features["games"] = n_played.astype(np.int16)
+    features = features.reset_index()
+    return features.astype({"Season": np.int16, "TeamID": np.int16})
+
+
+def compute_season_features(
+    input_dir: Path, genders: tuple[str, ...] = GENDERS, recent_games: int = RECENT_GAMES
+) -> pd.DataFrame:
+    frames = []
+    for gender in genders:
+        detailed = pd.read_csv(detailed_results_path(input_dir, gender))
+        features = season_aggregates(detailed, recent_games)
+        features.insert(0, "Gender", gender)
+        frames.append(features)
+    return pd.concat(frames, ignore_index=True)
+
+
+def _cache_key(input_dir: Path, genders: tuple[str, ...], recent_games: int, fingerprint: str) -> str:
+    payload = {
+        "version": FEATURE_VERSION,
+        "recent_games": recent_games,
+        "files": {
+            gender: file_fingerprint(detailed_results_path(input_dir, gender), fingerprint) for gender in genders
+        },
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def load_season_features(
+    input_dir: Path,
+    cache_dir: Path | None = DEFAULT_CACHE_DIR,
+    genders: tuple[str, ...] = GENDERS,
+    recent_games: int = RECENT_GAMES,
+    fingerprint: str = "stat",
+    refresh: bool = False,
+) -> pd.DataFrame:
+    """Season features, read from the Feather cache when the detailed results
+    files are unchanged and recomputed (and cached) otherwise.
+
+    The cache file name is derived from the input file fingerprints, so any
+    change to the inputs, genders or recent_games misses the cache.
+    """
+    if cache_dir is None:
+        return compute_season_features(input_dir, genders, recent_games)
+
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    key = _cache_key(input_dir, genders, recent_games, fingerprint)
+    cache_path = cache_dir / f"season_features_{'_'.join(genders)}_{key}.feather"
+    if cache_path.exists() and not refresh:
+        return feather.read_table(cache_path).to_pandas()
+
+    features = compute_season_features(input_dir, genders, recent_games)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    # older caches, and temp files of interrupted writes
+    for stale in cache_dir.glob(f"season_features_{'_'.join(genders)}_*.feather*"):
+        stale.unlink()
+    # written under a temp name and renamed, so an interrupted run never leaves
+    # a truncated cache behind for the next one to read
+    tmp_path = cache_path.with_name(f"{cache_path.name}.tmp{os.getpid()}")
+    feather.write_feather(
+        pa.Table.from_pandas(features, preserve_index=False), tmp_path, compression="uncompressed"
+    )
+    os.replace(tmp_path, cache_path)
+    return features
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build or load cached per-season team box-score features.")
+    parser.add_argument("--input-dir", type=Path, default=Path("input"))
+    parser.add_argument("--cache-dir", type=Path, default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--genders", type=str, default="M,W")
+    parser.add_argument("--recent-games", type=int, default=RECENT_GAMES)
+    parser.add_argument(
+        "--fingerprint",
+        choices=["stat", "sha256"],
+        default="stat",
+        help="How the cache recognises unchanged inputs: size+mtime (fast) or a content hash.",
+    )
+    parser.add_argument("--refresh", action="store_true", help="Recompute even if the cache is current.")
+    parser.add_argument("--output", type=Path, default=None, help="Optionally also write the features as CSV.")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    features = load_season_features(
+        args.input_dir,
+        args.cache_dir,
+        tuple(args.genders.split(",")),
+        args.recent_games,
+        args.fingerprint,
+        args.refresh,
+    )
+    elapsed = time.perf_counter() - started
+    if args.output is not None:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        features.to_csv(args.output, index=False)
+    print(f"{len(features):,} team-seasons x {features.shape[1]} columns in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
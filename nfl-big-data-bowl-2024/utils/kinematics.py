@@ -0,0 +1,135 @@
+"""
+Player-tracking kinematics for the Big Data Bowl tracking_week_*.csv files.
+
+The tracking rows are sorted once by (gameId, playId, nflId, frameId); every
+quantity that needs the previous frame is then a plain array difference with
+the first frame of each track masked out, instead of a per-player loop or a
+self-merge on a shifted index.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+
+LBS_TO_KG = 0.4535924
+YDS_TO_M = 0.9144
+J_TO_cal = 0.239006
+
+TRACK_KEYS = ["gameId", "playId", "nflId"]
+SORT_KEYS = TRACK_KEYS + ["frameId"]
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+# the football has no nflId; it gets its own track per play
+FOOTBALL_ID = -1
+
+
+def time_ns(values):
+    """
+    Tracking timestamps as int64 nanoseconds since the epoch. Accepts the raw
+    "YYYY-mm-dd HH:MM:SS.ffffff" strings, datetimes or already converted ints.
+    """
+    values = pd.Series(values) if not isinstance(values, pd.Series) else values
+    if pd.api.types.is_integer_dtype(values):
+        return values.to_numpy(dtype=np.int64)
+    if not pd.api.types.is_datetime64_any_dtype(values):
+        values = pd.to_datetime(values, format=TIME_FORMAT)
+    return values.to_numpy(dtype="datetime64[ns]").view(np.int64)
+
+
+def sort_tracking(df):
+    """Sorted copy of df with the football's missing nflId set to FOOTBALL_ID."""
+    df = df.assign(nflId=df["nflId"].fillna(FOOTBALL_ID).astype(np.int64))
+    return df.sort_values(SORT_KEYS, kind="stable", ignore_index=True)
+
+
+def track_starts(df):
+    """Boolean mask of the first frame of every (gameId, playId, nflId) track; df must be sorted."""
+    starts = np.zeros(len(df), dtype=bool)
+    if len(df):
+        starts[0] = True
+    for key in TRACK_KEYS:
+        values = df[key].to_numpy()
+        starts[1:] |= values[1:] != values[:-1]
+    return starts
+
+
+def grouped_diff(values, starts):
+    """values[i] - values[i - 1] within a track, NaN on the first frame of each track."""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.empty_like(values)
+    if values.size:
+        out[0] = np.nan
+        np.subtract(values[1:], values[:-1], out=out[1:])
+        out[starts] = np.nan
+    return out
+
+
+def add_kinematics(df, players=None, presorted=False):
+    """
+    Adds per-frame motion columns, derived from the positions:
+        dx, dy (yards), dt (seconds), dist (yards), speed (yd/s),
+        acceleration (yd/s^2) and jerk (yd/s^3).
+    With players (players.csv: nflId, weight in lbs) it also adds the energy
+    quantities from the tracked speed s, acceleration a and distance dis:
+        mass_kg, kinetic_energy_j, force_n, work_j, calories and power_w.
+    The football and players missing from players.csv get NaN for those.
+
+    Returns a new frame sorted by (gameId, playId, nflId, frameId).
+    """
+    if not presorted:
+        df = sort_tracking(df)
+    starts = track_starts(df)
+
+    dx = grouped_diff(df["x"].to_numpy(), starts)
+    dy = grouped_diff(df["y"].to_numpy(), starts)
+    dt = grouped_diff(time_ns(df["time"]), starts) / 1e9
+    dist = np.hypot(dx, dy)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        speed = dist / dt
+        acceleration = grouped_diff(speed, starts) / dt
+        jerk = grouped_diff(acceleration, starts) / dt
+
+    out = {"dx": dx, "dy": dy, "dt": dt, "dist": dist, "speed": speed, "acceleration": acceleration, "jerk": jerk}
+
+    if players is not None:
+        weight_lbs = df["nflId"].map(players.drop_duplicates("nflId").set_index("nflId")["weight"])
+        mass_kg = weight_lbs.to_numpy(dtype=np.float64) * LBS_TO_KG
+        speed_ms = df["s"].to_numpy(dtype=np.float64) * YDS_TO_M
+        force_n = mass_kg * df["a"].to_numpy(dtype=np.float64) * YDS_TO_M
+        work_j = force_n * df["dis"].to_numpy(dtype=np.float64) * YDS_TO_M
+        with np.errstate(divide="ignore", invalid="ignore"):
+            power_w = work_j / dt
+        out.update(
+            {
+                "mass_kg": mass_kg,
+                "kinetic_energy_j": 0.5 * mass_kg * speed_ms**2,
+                "force_n": force_n,
+                "work_j": work_j,
+                "calories": work_j * J_TO_cal,
+                "power_w": power_w,
+            }
+        )
+
+    return df.assign(**out)
+
+
+def benchmark_week(tracking_path, players_path=None):
+    """Times reading one tracking week and adding its kinematics."""
+    t0 = time.perf_counter()
+    df = pd.read_csv(tracking_path)
+    players = pd.read_csv(players_path, usecols=["nflId", "weight"]) if players_path else None
+    read_seconds = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    df = add_kinematics(df, players)
+    kinematics_seconds = time.perf_counter() - t0
+    return {"rows": len(df), "read_seconds": read_seconds, "kinematics_seconds": kinematics_seconds}
+
+
+if __name__ == "__main__":
+    import sys
+
+    result = benchmark_week(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
+    for key, value in result.items():
+        print(f"{key}: {value}")
@@ -0,0 +1,202 @@
+"""
+Columnar, memory-mapped store for the Big Data Bowl tracking weeks.
+
+Each tracking_week_*.csv is ingested once: timestamps are parsed in one
+vectorized call, IDs become int32, the measurements float32 and the text
+columns dictionary-encoded. Every game is written to its own uncompressed
+Feather file, sorted by (playId, nflId, frameId), and a small play index keeps
+the row range of every play. Reading a play memory-maps its game file and
+slices those rows, so nothing else is read from disk.
+
+Layout under root:
+    plays.feather          week, gameId, playId, start, stop
+    games/<gameId>.feather tracking rows of one game
+"""
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from .kinematics import FOOTBALL_ID, SORT_KEYS, time_ns
+
+
+STORE_VERSION = 1
+# missing jersey numbers (the football) are stored as this value
+NO_JERSEY = -1
+
+CSV_DTYPES = {
+    "gameId": np.int32,
+    "playId": np.int32,
+    "nflId": np.float64,
+    "frameId": np.int16,
+    "jerseyNumber": np.float32,
+    "x": np.float32,
+    "y": np.float32,
+    "s": np.float32,
+    "a": np.float32,
+    "dis": np.float32,
+    "o": np.float32,
+    "dir": np.float32,
+    "displayName": "category",
+    "club": "category",
+    "playDirection": "category",
+    "event": "category",
+}
+
+
+def week_from_path(csv_path):
+    match = re.search(r"week_(\d+)", os.path.basename(csv_path))
+    if match is None:
+        raise ValueError(f"Cannot tell the week from {csv_path}; pass week= explicitly")
+    return int(match.group(1))
+
+
+def read_tracking_csv(csv_path):
+    """One tracking week as a sorted frame with the store's compact dtypes."""
+    df = pd.read_csv(csv_path, dtype=CSV_DTYPES)
+    df["nflId"] = df["nflId"].fillna(FOOTBALL_ID).astype(np.int32)
+    df["jerseyNumber"] = df["jerseyNumber"].fillna(NO_JERSEY).astype(np.int8)
+    df["time"] = time_ns(df["time"])
+    return df.sort_values(SORT_KEYS, kind="stable", ignore_index=True)
+
+
+class TrackingStore:
+    def __init__(self, root):
+        self.root = root
+        self.games_dir = os.path.join(root, "games")
+        self.index_path = os.path.join(root, "plays.feather")
+        self._index = None
+
+    @property
+    def index(self):
+        """One row per play: week, gameId, playId and its row range in the game file."""
+        if self._index is None:
+            if os.path.exists(self.index_path):
+                import pyarrow.feather as feather
+
+                self._index = feather.read_table(self.index_path, memory_map=True).to_pandas()
+            else:
+                self._index = pd.DataFrame(
+                    {
+                        "week": pd.Series(dtype=np.int16),
+                        "gameId": pd.Series(dtype=np.int32),
+                        "playId": pd.Series(dtype=np.int32),
+                        "start": pd.Series(dtype=np.int64),
+                        "stop": pd.Series(dtype=np.int64),
+                    }
+                )
+        return self._index
+
+    def weeks(self):
+        return sorted(self.index["week"].unique().tolist())
+
+    def _game_path(self, game_id):
+        return os.path.join(self.games_dir, f"{int(game_id)}.feather")
+
+    def ingest_week(self, csv_path, week=None):
+        """
+        Converts one tracking week into the store, replacing that week if it was
+        ingested before. Returns the number of rows written.
+        """
+        import pyarrow as pa
+        import pyarrow.feather as feather
+
+        week = week_from_path(csv_path) if week is None else week
+        df = read_tracking_csv(csv_path)
+        os.makedirs(self.games_dir, exist_ok=True)
+
+        game_ids = df["gameId"].to_numpy()
+        game_bounds = np.flatnonzero(np.r_[True, game_ids[1:] != game_ids[:-1], True])
+        play_ids = df["playId"].to_numpy()
+        plays = []
+        for start, stop in zip(game_bounds[:-1], game_bounds[1:]):
+            game = df.iloc[start:stop]
+            feather.write_feather(
+                pa.Table.from_pandas(game, preserve_index=False),
+                self._game_path(game_ids[start]),
+                compression="uncompressed",
+            )
+            game_plays = play_ids[start:stop]
+            play_bounds = np.flatnonzero(np.r_[True, game_plays[1:] != game_plays[:-1], True])
+            plays.append(
+                pd.DataFrame(
+                    {
+                        "week": np.int16(week),
+                        "gameId": np.int32(game_ids[start]),
+                        "playId": game_plays[play_bounds[:-1]],
+                        "start": play_bounds[:-1].astype(np.int64),
+                        "stop": play_bounds[1:].astype(np.int64),
+                    }
+                )
+            )
+
+        index = self.index
+        stale_games = set(index.loc[index["week"] == week, "gameId"].tolist()) - set(np.unique(game_ids).tolist())
+        for game_id in stale_games:
+            os.remove(self._game_path(game_id))
+        index = pd.concat([index[index["week"] != week]] + plays, ignore_index=True)
+        index = index.sort_values(["gameId", "playId"], kind="stable", ignore_index=True)
+        feather.write_feather(
+            pa.Table.from_pandas(index, preserve_index=False), self.index_path, compression="uncompressed"
+        )
+        self._index = index
+        return len(df)
+
+    def _game_table(self, game_id):
+        import pyarrow.feather as feather
+
+        path = self._game_path(game_id)
+        if not os.path.exists(path):
+            raise KeyError(f"Game {game_id} is not in the store")
+        return feather.read_table(path, memory_map=True)
+
+    def load_play(self, game_id, play_id, columns=None):
+        """One play, sorted by (nflId, frameId); only its rows are copied out of the memory map."""
+        index = self.index
+        pos = np.flatnonzero((index["gameId"].to_numpy() == game_id) & (index["playId"].to_numpy() == play_id))
+        if pos.size == 0:
+            raise KeyError(f"Play {game_id}/{play_id} is not in the store")
+        start, stop = index["start"].iat[pos[0]], index["stop"].iat[pos[0]]
+        table = self._game_table(game_id).slice(start, stop - start)
+        if columns is not None:
+            table = table.select(columns)
+        return table.to_pandas()
+
+    def load_game(self, game_id, columns=None):
+        table = self._game_table(game_id)
+        if columns is not None:
+            table = table.select(columns)
+        return table.to_pandas()
+
+    def load_weeks(self, weeks=None, columns=None):
+        """All games of the given weeks (default: every week) as one frame."""
+        import pyarrow as pa
+
+        index = self.index
+        if weeks is not None:
+            index = index[index["week"].isin(weeks)]
+        tables = []
+        for game_id in index["gameId"].unique():
+            table = self._game_table(game_id)
+            tables.append(table.select(columns) if columns is not None else table)
+        if not tables:
+            raise KeyError(f"No games in the store for weeks {weeks}")
+        return pa.concat_tables(tables, promote_options="permissive").to_pandas()
+
+
+def ingest_weeks(root, csv_paths):
+    """Ingests every csv into the store at root and reports rows and seconds per week."""
+    store = TrackingStore(root)
+    for csv_path in csv_paths:
+        t0 = time.perf_counter()
+        rows = store.ingest_week(csv_path)
+        print(f"{os.path.basename(csv_path)}: {rows:,} rows in {time.perf_counter() - t0:.1f}s")
+    return store
+
+
+if __name__ == "__main__":
+    import sys
+
+    ingest_weeks(sys.argv[1], sys.argv[2:])
@@ -4,15 +4,21 @@ Mirrors the production timeseries API in the crucial respects, but won't be as f
 
 ONLY works afer the first three variables in MockAPI.__init__ are populated.
 '''
+import json
 import os
+import queue
+import sys
+import threading
+import time
 
-from typing import Sequence, Tuple
+from typing import Iterator, Optional, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
 
 
 class MockApi:
-    def __init__(self):
+    def __init__(self, cache_dir: Optional[str] = None, prefetch: int = 0, instrument: bool = False):
         '''
         YOU MUST UPDATE THE FIRST THREE LINES of this method.
         They've been intentionally left in an invalid state.
@@ -22,6 +28,17 @@ class MockApi:
             group_id_column: the column that identifies which groups of rows the API should serve.
                 A call to iter_test serves all rows of all dataframes with the current group ID value.
             export_group_id_column: if true, the dataframes iter_test serves will include the group_id_column values.
+
+        Optional arguments:
+            cache_dir: if set, each csv is converted once to an uncompressed Feather file in this directory
+                and read back from it on later runs instead of parsing the csv again. A cached file is rebuilt
+                when its source csv changes size or mtime.
+            prefetch: if greater than zero, a worker thread slices up to this many upcoming data blocks
+                while the caller is still working on the current one.
+            instrument: if true, records per data block the time spent inside the API, the time spent in user code
+                between the yield and predict(), the rows served per dataframe and the peak RSS while the block ran,
+                and writes them next to the submission as submission_timings.csv and submission_timings.json.
+                The json summary also has the peak RSS of the whole run.
         '''
         DIR = os.path.dirname(os.path.abspath(__file__))
         TEST_DIR = os.path.join(DIR, "example_test_files")
@@ -33,8 +50,14 @@ class MockApi:
         # iter_test is only designed to support at least two dataframes, such as test and sample_submission
         assert len(self.input_paths) >= 2
 
+        self.cache_dir = cache_dir
+        self.prefetch = prefetch
+        self.instrument = instrument
+        self.submission_path: str = 'submission.csv'
         self._status = 'initialized'
-        self.predictions = []
+        self._submission_columns = None
+        self.timings = []
+        self._block_rss = None
 
     def iter_test(self) -> Tuple[pd.DataFrame]:
         '''
@@ -45,36 +68,181 @@ class MockApi:
 
             raise Exception('WARNING: the real API can only iterate over `iter_test()` once.')
 
+        started = time.perf_counter()
         dataframes = []
         for pth in self.input_paths:
-            dataframes.append(pd.read_csv(pth, low_memory=False))
-        group_order = dataframes[0][self.group_id_column].drop_duplicates().tolist()
-        dataframes = [df.set_index(self.group_id_column) for df in dataframes]
+            dataframes.append(self._load_input(pth))
+        group_order = dataframes[0][self.group_id_column].drop_duplicates().to_numpy()
+        indexed = [self._index_groups(df, group_order) for df in dataframes]
+
+        blocks = self._iter_blocks(indexed, len(group_order))
+        if self.prefetch > 0:
+            blocks = self._prefetch_blocks(blocks)
 
-        for group_id in group_order:
+        block_started = time.perf_counter()
+        load_seconds = block_started - started
+        if self.instrument:
+            self._block_rss = _BlockPeakRss()
+            self._block_rss.start()
+        for group_pos, current_data in enumerate(blocks):
             self._status = 'prediction_needed'
-            current_data = []
-            for df in dataframes:
-                cur_df = df.loc[group_id].copy()
-                # returning single line dataframes from df.loc requires special handling
-                if not isinstance(cur_df, pd.DataFrame):
-                    cur_df = pd.DataFrame({a: b for a, b in zip(cur_df.index.values, cur_df.values)}, index=[group_id])
-                    cur_df.index.name = self.group_id_column
-                cur_df = cur_df.reset_index(drop=not(self.export_group_id_column))
-                current_data.append(cur_df)
-            yield tuple(current_data)
+            if self.instrument:
+                self._start_block_timing(group_order[group_pos], current_data, block_started)
+            yield current_data
 
             while self._status != 'prediction_received':
                 print('You must call `predict()` successfully before you can continue with `iter_test()`', flush=True)
                 yield None
+            if self.instrument:
+                block_started = self._finish_block_timing()
 
-        with open('submission.csv', 'w') as f_open:
-            pd.concat(self.predictions).to_csv(f_open, index=False)
+        if self.instrument:
+            self._block_rss.close()
+            self._write_timings(load_seconds)
         self._status = 'finished'
 
+    def _iter_blocks(self, indexed, n_groups: int) -> Iterator[Tuple[pd.DataFrame]]:
+        for group_pos in range(n_groups):
+            current_data = []
+            for df, starts, ends in indexed:
+                current_data.append(df.iloc[starts[group_pos]:ends[group_pos]].reset_index(drop=True))
+            yield tuple(current_data)
+
+    def _prefetch_blocks(self, blocks: Iterator[Tuple[pd.DataFrame]]) -> Iterator[Tuple[pd.DataFrame]]:
+        '''
+        Runs `blocks` on a worker thread that stays at most self.prefetch blocks ahead.
+        Errors raised by the worker are re-raised in the caller.
+        '''
+        buffer = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+        done = object()
+
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    buffer.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def worker():
+            try:
+                for block in blocks:
+                    if not put(block):
+                        return
+                put(done)
+            except BaseException as e:
+                put(e)
+
+        thread = threading.Thread(target=worker, name='MockApi-prefetch', daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = buffer.get()
+                if item is done:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            thread.join()
+
+    def _start_block_timing(self, group_id, current_data: Tuple[pd.DataFrame], block_started: float):
+        served_at = time.perf_counter()
+        timing = {self.group_id_column: group_id.item() if hasattr(group_id, 'item') else group_id}
+        for pth, df in zip(self.input_paths, current_data):
+            timing['rows_' + os.path.splitext(os.path.basename(pth))[0]] = len(df)
+        timing['api_seconds'] = served_at - block_started
+        timing['_served_at'] = served_at
+        self.timings.append(timing)
+
+    def _finish_block_timing(self) -> float:
+        '''
+        Closes the current block's record once iter_test resumes, and returns that moment as the next block's start.
+        User time is everything outside the API: yield -> predict() and predict() -> resuming iter_test.
+        '''
+        resumed_at = time.perf_counter()
+        timing = self.timings[-1]
+        served_at = timing.pop('_served_at')
+        predict_called = timing.pop('_predict_called')
+        predict_returned = timing.pop('_predict_returned')
+        timing['api_seconds'] += predict_returned - predict_called
+        timing['user_seconds'] = (predict_called - served_at) + (resumed_at - predict_returned)
+        timing['peak_rss_mb'] = self._block_rss.peak_mb()
+        self._block_rss.start()
+        return resumed_at
+
+    def _write_timings(self, load_seconds: float):
+        report_stem = os.path.splitext(self.submission_path)[0] + '_timings'
+        pd.DataFrame(self.timings).to_csv(report_stem + '.csv', index=False)
+        report = {
+            'load_seconds': load_seconds,
+            'blocks': len(self.timings),
+            'total_api_seconds': load_seconds + sum(t['api_seconds'] for t in self.timings),
+            'total_user_seconds': sum(t['user_seconds'] for t in self.timings),
+            'peak_rss_mb': self._block_rss.run_peak_mb,
+            'timings': self.timings,
+        }
+        with open(report_stem + '.json', 'w') as f_open:
+            json.dump(report, f_open, indent=2)
+
+    def _load_input(self, pth: str) -> pd.DataFrame:
+        '''
+        Reads one input csv, going through the Feather cache when cache_dir is set.
+        '''
+        if self.cache_dir is None:
+            return pd.read_csv(pth, low_memory=False)
+
+        import pyarrow as pa
+        import pyarrow.feather as feather
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        cache_path = os.path.join(self.cache_dir, os.path.basename(pth) + '.feather')
+        meta_path = cache_path + '.json'
+        source_stat = os.stat(pth)
+        source_meta = {'source': os.path.abspath(pth), 'size': source_stat.st_size, 'mtime_ns': source_stat.st_mtime_ns}
+
+        if os.path.exists(cache_path) and os.path.exists(meta_path):
+            with open(meta_path) as f_open:
+                cached_meta = json.load(f_open)
+            if cached_meta == source_meta:
+                return feather.read_table(cache_path).to_pandas()
+
+        df = pd.read_csv(pth, low_memory=False)
+        # Both files are written under temporary names and moved into place, the metadata last and only
+        # after the stale one is gone, so an interrupted write never leaves a matching pair behind.
+        tmp_suffix = f'.tmp{os.getpid()}'
+        feather.write_feather(
+            pa.Table.from_pandas(df, preserve_index=False), cache_path + tmp_suffix, compression='uncompressed'
+        )
+        with open(meta_path + tmp_suffix, 'w') as f_open:
+            json.dump(source_meta, f_open)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        os.replace(cache_path + tmp_suffix, cache_path)
+        os.replace(meta_path + tmp_suffix, meta_path)
+        return df
+
+    def _index_groups(self, df: pd.DataFrame, group_order: np.ndarray) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray]:
+        '''
+        Sorts df by the group column once (stable, so rows keep their file order within a group)
+        and returns it with the [start, end) row offsets of every group in group_order.
+        Groups missing from df get an empty slice.
+        '''
+        columns = [col for col in df.columns if col != self.group_id_column]
+        if self.export_group_id_column:
+            columns = [self.group_id_column] + columns
+        df = df.sort_values(self.group_id_column, kind='stable', ignore_index=True)
+        group_values = df[self.group_id_column].to_numpy()
+        starts = np.searchsorted(group_values, group_order, side='left')
+        ends = np.searchsorted(group_values, group_order, side='right')
+        return df[columns], starts, ends
+
     def predict(self, user_predictions: pd.DataFrame):
         '''
-        Accepts and stores the user's predictions and unlocks iter_test once that is done
+        Accepts the user's predictions, appends them to the submission file and unlocks iter_test once that is done
         '''
         if self._status == 'finished':
             raise Exception('You have already made predictions for the full test set.')
@@ -82,10 +250,139 @@ class MockApi:
             raise Exception('You must get the next test sample from `iter_test()` first.')
         if not isinstance(user_predictions, pd.DataFrame):
             raise Exception('You must provide a DataFrame.')
+        if self.instrument:
+            self.timings[-1]['_predict_called'] = time.perf_counter()
 
-        self.predictions.append(user_predictions)
+        self._append_predictions(user_predictions)
         self._status = 'prediction_received'
+        if self.instrument:
+            self.timings[-1]['_predict_returned'] = time.perf_counter()
+
+    def _append_predictions(self, user_predictions: pd.DataFrame):
+        '''
+        Streams one block of predictions to self.submission_path. The first block truncates the file and
+        writes the header; later blocks must carry the same columns and are appended, so only the current
+        block is ever held and everything predicted so far survives a crash.
+        '''
+        if self._submission_columns is None:
+            self._submission_columns = list(user_predictions.columns)
+            mode, header = 'w', True
+        else:
+            if set(user_predictions.columns) != set(self._submission_columns):
+                raise Exception(f'Predictions must have the columns {self._submission_columns}, got {list(user_predictions.columns)}.')
+            user_predictions = user_predictions[self._submission_columns]
+            mode, header = 'a', False
+
+        with open(self.submission_path, mode, newline='') as f_open:
+            user_predictions.to_csv(f_open, index=False, header=header)
+
+
+def _current_rss_mb() -> Optional[float]:
+    '''
+    Resident set size of this process right now, or None where it can't be read.
+    '''
+    try:
+        with open('/proc/self/statm') as f_open:
+            resident_pages = int(f_open.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss / (1024 * 1024)
+
+
+class _BlockPeakRss:
+    '''
+    Peak RSS between start() and peak_mb(). On Linux start() resets the kernel's high-water mark (VmHWM) through
+    /proc/self/clear_refs and peak_mb() reads it back, so a block that allocates and frees a large temporary still
+    shows it. Elsewhere a psutil thread samples the RSS every `interval` seconds, which can miss very short spikes.
+    '''
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        # the peak before the first reset, i.e. of loading the inputs
+        self.run_peak_mb = _peak_rss_mb()
+        self._use_hwm = _reset_hwm()
+        self._sampled_mb = None
+        self._stop = threading.Event()
+        self._thread = None
+        if not self._use_hwm and _current_rss_mb() is not None:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            rss = _current_rss_mb()
+            if rss is not None and (self._sampled_mb is None or rss > self._sampled_mb):
+                self._sampled_mb = rss
+
+    def start(self):
+        if self._use_hwm:
+            _reset_hwm()
+        else:
+            self._sampled_mb = _current_rss_mb()
+
+    def peak_mb(self) -> Optional[float]:
+        if self._use_hwm:
+            peak = _hwm_mb()
+        else:
+            samples = [rss for rss in (self._sampled_mb, _current_rss_mb()) if rss is not None]
+            peak = max(samples) if samples else None
+        if peak is not None:
+            self.run_peak_mb = peak if self.run_peak_mb is None else max(self.run_peak_mb, peak)
+        return peak
+
+    def close(self):
+        self.peak_mb()
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+
+
+def _reset_hwm() -> bool:
+    '''
+    Resets this process's VmHWM to its current RSS (Linux 4.0+); False where that isn't possible.
+    '''
+    try:
+        with open('/proc/self/clear_refs', 'w') as f_open:
+            f_open.write('5')
+    except OSError:
+        return False
+    return _hwm_mb() is not None
+
+
+def _hwm_mb() -> Optional[float]:
+    try:
+        with open('/proc/self/status') as f_open:
+            for line in f_open:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _peak_rss_mb() -> Optional[float]:
+    '''
+    Peak resident set size of this process so far, or None where it can't be read.
+    '''
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        memory = psutil.Process().memory_info()
+        return getattr(memory, 'peak_wset', memory.rss) / (1024 * 1024)
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
 
 
-def make_env():
-    return MockApi()
+def make_env(**kwargs):
+    return MockApi(**kwargs)
@@ -0,0 +1,100 @@
+"""
+Calendar features for the Enefit feature pipeline.
+
+FeatureEngineer._holidays_features used to call back into Python for every
+row and scan a list of holiday dates. HolidayCalendar precomputes one row per
+calendar day instead (holiday flag, distance to the surrounding holidays,
+bridge days) and attaches it to the features with a single join on the date.
+"""
+import datetime
+
+import numpy as np
+import polars as pl
+
+
+class HolidayCalendar:
+    def __init__(self, holiday_dates, start=None, end=None):
+        """
+        holiday_dates: iterable of datetime.date. The table covers
+        start..end (inclusive), by default the full years spanned by the holidays.
+        """
+        holiday_dates = sorted(set(holiday_dates))
+        if not holiday_dates:
+            raise ValueError("HolidayCalendar needs at least one holiday date")
+        if start is None:
+            start = datetime.date(holiday_dates[0].year, 1, 1)
+        if end is None:
+            end = datetime.date(holiday_dates[-1].year, 12, 31)
+
+        self.holiday_dates = holiday_dates
+        self.table = self._build_table(holiday_dates, start, end)
+
+    @classmethod
+    def from_country(cls, country="EE", years=range(2021, 2026)):
+        import holidays
+
+        return cls(holidays.country_holidays(country, years=years).keys())
+
+    @staticmethod
+    def _build_table(holiday_dates, start, end):
+        days = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D") + 1)
+        holidays_d = np.array(holiday_dates, dtype="datetime64[D]")
+        is_holiday = np.isin(days, holidays_d)
+
+        # 1970-01-01 was a Thursday; shift so Monday == 0
+        weekday = (days.astype(np.int64) + 3) % 7
+        is_off = is_holiday | (weekday >= 5)
+
+        next_pos = np.searchsorted(holidays_d, days, side="left")
+        has_next = next_pos < holidays_d.size
+        days_to_next = np.where(
+            has_next, (holidays_d[np.minimum(next_pos, holidays_d.size - 1)] - days).astype(np.int64), -1
+        )
+
+        prev_pos = np.searchsorted(holidays_d, days, side="right") - 1
+        has_prev = prev_pos >= 0
+        days_since_prev = np.where(has_prev, (days - holidays_d[np.maximum(prev_pos, 0)]).astype(np.int64), -1)
+
+        # a working day squeezed between two days off, next to an actual
+        # holiday, e.g. the Friday after a Thursday holiday
+        off_before = np.concatenate([[False], is_off[:-1]])
+        off_after = np.concatenate([is_off[1:], [False]])
+        holiday_adjacent = np.concatenate([[False], is_holiday[:-1]]) | np.concatenate([is_holiday[1:], [False]])
+        is_bridge_day = ~is_off & off_before & off_after & holiday_adjacent
+
+        return pl.DataFrame(
+            {
+                "date": days,
+                "is_country_holiday": is_holiday,
+                "days_to_next_holiday": days_to_next,
+                "days_since_holiday": days_since_prev,
+                "is_bridge_day": is_bridge_day,
+            }
+        ).with_columns(
+            pl.col("date").cast(pl.Date),
+            # null when the table has no holiday on that side of the day
+            pl.when(pl.col("days_to_next_holiday") >= 0).then(pl.col("days_to_next_holiday")).cast(pl.Int16),
+            pl.when(pl.col("days_since_holiday") >= 0).then(pl.col("days_since_holiday")).cast(pl.Int16),
+        )
+
+    def add_features(self, df_features, date_column="date"):
+        """
+        Left-joins the calendar onto df_features. Without a date column the
+        date is assembled from year/month/day, the columns the old per-row
+        callback used.
+        """
+        drop_date = False
+        if date_column not in df_features.columns:
+            df_features = df_features.with_columns(pl.date("year", "month", "day").alias(date_column))
+            drop_date = True
+
+        table = self.table.rename({"date": date_column}) if date_column != "date" else self.table
+        df_features = df_features.join(
+            table, on=date_column, how="left"
+        ).with_columns(
+            pl.col("is_country_holiday").fill_null(False),
+            pl.col("is_bridge_day").fill_null(False),
+        )
+        if drop_date:
+            df_features = df_features.drop(date_column)
+        return df_features
@@ -0,0 +1,281 @@
+"""
+History store for the Enefit inference loop.
+
+DataStorage keeps the train history plus every block revealed by the
+time-series API. Each table lives in an AppendOnlyTable that stays sorted by
+its time column, so a new block is deduplicated only against the rows in the
+time window it touches and the cost of an update depends on the block size,
+not on the length of the history.
+"""
+import datetime
+import os
+
+import polars as pl
+
+
+# Appends are zero-copy chunk concatenations; past this many chunks the
+# frame is rechunked once so joins keep scanning contiguous memory.
+MAX_CHUNKS = 64
+
+
+class AppendOnlyTable:
+    """
+    A polars frame kept sorted by (time_column, *other key columns) with
+    unique keys. Rows already stored win over later rows with the same key.
+    """
+
+    def __init__(self, df, keys, time_column):
+        if time_column not in keys:
+            raise ValueError(f"time_column {time_column!r} must be one of the keys {keys}")
+        self.keys = list(keys)
+        self.time_column = time_column
+        self.sort_columns = [time_column] + [k for k in self.keys if k != time_column]
+        self.df = (
+            df.filter(pl.col(time_column).is_not_null())
+            .unique(subset=self.keys, keep="first", maintain_order=True)
+            .sort(self.sort_columns)
+        )
+
+    def __len__(self):
+        return self.df.height
+
+    def append(self, new_df):
+        new_df = (
+            new_df.select(self.df.columns)
+            .filter(pl.col(self.time_column).is_not_null())
+            .unique(subset=self.keys, keep="first", maintain_order=True)
+        )
+        if new_df.height == 0:
+            return 0
+
+        window_start = self.df.get_column(self.time_column).search_sorted(
+            new_df.get_column(self.time_column).min(), side="left"
+        )
+        head = self.df.slice(0, window_start)
+        window = self.df.slice(window_start)
+
+        new_df = new_df.join(window.select(self.keys), on=self.keys, how="anti")
+        if new_df.height == 0:
+            return 0
+        new_df = new_df.sort(self.sort_columns)
+
+        if window.height == 0 or self._sorts_after(window, new_df):
+            tail = pl.concat([window, new_df], how="vertical", rechunk=False)
+        else:
+            tail = pl.concat([window, new_df], how="vertical").sort(self.sort_columns)
+
+        self.df = pl.concat([head, tail], how="vertical", rechunk=False)
+        if self.df.n_chunks() > MAX_CHUNKS:
+            self.df = self.df.rechunk()
+        return new_df.height
+
+    def _sorts_after(self, window, new_df):
+        last = window.select(self.sort_columns).row(-1)
+        first = new_df.select(self.sort_columns).row(0)
+        return _row_key(last) <= _row_key(first)
+
+
+def _row_key(row):
+    # nulls sort first, as in polars' default ordering
+    return tuple((value is not None, value) for value in row)
+
+
+class DataStorage:
+    data_cols = [
+        "target",
+        "county",
+        "is_business",
+        "product_type",
+        "is_consumption",
+        "datetime",
+        "row_id",
+    ]
+    client_cols = [
+        "product_type",
+        "county",
+        "eic_count",
+        "installed_capacity",
+        "is_business",
+        "date",
+    ]
+    gas_prices_cols = ["forecast_date", "lowest_price_per_mwh", "highest_price_per_mwh"]
+    electricity_prices_cols = ["forecast_date", "euros_per_mwh"]
+    forecast_weather_cols = [
+        "latitude",
+        "longitude",
+        "hours_ahead",
+        "temperature",
+        "dewpoint",
+        "cloudcover_high",
+        "cloudcover_low",
+        "cloudcover_mid",
+        "cloudcover_total",
+        "10_metre_u_wind_component",
+        "10_metre_v_wind_component",
+        "forecast_datetime",
+        "direct_solar_radiation",
+        "surface_solar_radiation_downwards",
+        "snowfall",
+        "total_precipitation",
+    ]
+    historical_weather_cols = [
+        "datetime",
+        "temperature",
+        "dewpoint",
+        "rain",
+        "snowfall",
+        "surface_pressure",
+        "cloudcover_total",
+        "cloudcover_low",
+        "cloudcover_mid",
+        "cloudcover_high",
+        "windspeed_10m",
+        "winddirection_10m",
+        "shortwave_radiation",
+        "direct_solar_radiation",
+        "diffuse_radiation",
+        "latitude",
+        "longitude",
+    ]
+    location_cols = ["longitude", "latitude", "county"]
+    target_cols = [
+        "target",
+        "county",
+        "is_business",
+        "product_type",
+        "is_consumption",
+        "datetime",
+    ]
+
+    client_keys = ["date", "county", "is_business", "product_type"]
+    gas_prices_keys = ["forecast_date"]
+    electricity_prices_keys = ["forecast_date"]
+    forecast_weather_keys = ["forecast_datetime", "latitude", "longitude", "hours_ahead"]
+    historical_weather_keys = ["datetime", "latitude", "longitude"]
+    target_keys = ["datetime", "county", "is_business", "product_type", "is_consumption"]
+
+    def __init__(self, root=None, min_datetime=datetime.datetime(2022, 1, 1), weather_grid=None):
+        # root = "/kaggle/input/predict-energy-behavior-of-prosumers"
+        self.root = os.getcwd() if root is None else root
+        # utils.weather_grid.WeatherGrid; when set, the weather tables carry grid_cell_id
+        self.weather_grid = weather_grid
+
+        self.df_data = self._read("train.csv", self.data_cols)
+        df_client = self._read("client.csv", self.client_cols)
+        df_gas_prices = self._read("gas_prices.csv", self.gas_prices_cols)
+        df_electricity_prices = self._read("electricity_prices.csv", self.electricity_prices_cols).drop_nulls()
+        df_forecast_weather = self._read("forecast_weather.csv", self.forecast_weather_cols)
+        df_historical_weather = self._read("historical_weather.csv", self.historical_weather_cols)
+        self.df_weather_station_to_county_mapping = self._read(
+            "weather_station_to_county_mapping.csv", self.location_cols
+        ).with_columns(
+            pl.col("latitude").cast(pl.datatypes.Float32),
+            pl.col("longitude").cast(pl.datatypes.Float32),
+        )
+
+        self.df_data = self.df_data.filter(pl.col("datetime") >= min_datetime)
+        df_target = self.df_data.select(self.target_cols)
+
+        self.schema_data = self.df_data.schema
+        self.schema_client = df_client.schema
+        self.schema_gas_prices = df_gas_prices.schema
+        self.schema_electricity_prices = df_electricity_prices.schema
+        self.schema_forecast_weather = df_forecast_weather.schema
+        self.schema_historical_weather = df_historical_weather.schema
+        self.schema_target = df_target.schema
+
+        df_forecast_weather = self._add_grid_cell_id(df_forecast_weather)
+        df_historical_weather = self._add_grid_cell_id(df_historical_weather)
+
+        self.client = AppendOnlyTable(df_client, self.client_keys, "date")
+        self.gas_prices = AppendOnlyTable(df_gas_prices, self.gas_prices_keys, "forecast_date")
+        self.electricity_prices = AppendOnlyTable(df_electricity_prices, self.electricity_prices_keys, "forecast_date")
+        self.forecast_weather = AppendOnlyTable(df_forecast_weather, self.forecast_weather_keys, "forecast_datetime")
+        self.historical_weather = AppendOnlyTable(df_historical_weather, self.historical_weather_keys, "datetime")
+        self.target = AppendOnlyTable(df_target, self.target_keys, "datetime")
+
+    def _read(self, file_name, columns):
+        return pl.read_csv(os.path.join(self.root, file_name), columns=columns, try_parse_dates=True)
+
+    def _add_grid_cell_id(self, df):
+        return df if self.weather_grid is None else self.weather_grid.add_grid_cell_id(df)
+
+    # The feature code reads the history through these attributes.
+    @property
+    def df_client(self):
+        return self.client.df
+
+    @property
+    def df_gas_prices(self):
+        return self.gas_prices.df
+
+    @property
+    def df_electricity_prices(self):
+        return self.electricity_prices.df
+
+    @property
+    def df_forecast_weather(self):
+        return self.forecast_weather.df
+
+    @property
+    def df_historical_weather(self):
+        return self.historical_weather.df
+
+    @property
+    def df_target(self):
+        return self.target.df
+
+    @property
+    def df_grid_cell_to_county(self):
+        """grid_cell_id -> county; replaces the float join on df_weather_station_to_county_mapping."""
+        if self.weather_grid is None:
+            raise ValueError("DataStorage was created without a weather_grid")
+        return self.weather_grid.county_mapping()
+
+    def update_with_new_data(
+        self,
+        df_new_client,
+        df_new_gas_prices,
+        df_new_electricity_prices,
+        df_new_forecast_weather,
+        df_new_historical_weather,
+        df_new_target,
+    ):
+        self.client.append(
+            pl.from_pandas(df_new_client[self.client_cols], schema_overrides=self.schema_client)
+        )
+        self.gas_prices.append(
+            pl.from_pandas(df_new_gas_prices[self.gas_prices_cols], schema_overrides=self.schema_gas_prices)
+        )
+        self.electricity_prices.append(
+            pl.from_pandas(
+                df_new_electricity_prices[self.electricity_prices_cols],
+                schema_overrides=self.schema_electricity_prices,
+            )
+        )
+        self.forecast_weather.append(
+            self._add_grid_cell_id(
+                pl.from_pandas(
+                    df_new_forecast_weather[self.forecast_weather_cols],
+                    schema_overrides=self.schema_forecast_weather,
+                )
+            )
+        )
+        self.historical_weather.append(
+            self._add_grid_cell_id(
+                pl.from_pandas(
+                    df_new_historical_weather[self.historical_weather_cols],
+                    schema_overrides=self.schema_historical_weather,
+                )
+            )
+        )
+        self.target.append(
+            pl.from_pandas(df_new_target[self.target_cols], schema_overrides=self.schema_target)
+        )
+
+    def preprocess_test(self, df_test):
+        df_test = df_test.rename(columns={"prediction_datetime": "datetime"})
+        df_test = pl.from_pandas(
+            df_test[self.data_cols[1:]], schema_overrides=self.schema_data
+        )
+        return df_test
@@ -0,0 +1,154 @@
+"""
+Geometry helpers for the Geos road-network notebook.
+
+find_intersections replaces the self-overlay of the whole road layer: an
+STRtree over the line bounding boxes proposes candidate pairs, self-pairs and
+mirrored pairs are dropped before any geometry is intersected, and the exact
+intersections are computed in one vectorized shapely call. The haversine
+functions take arrays of coordinates instead of one pair of Points at a time.
+"""
+import numpy as np
+import pandas as pd
+
+
+# same radii as the notebook's haversine
+EARTH_RADIUS = {"m": 6378137.0, "km": 6378.137, "mi": 3959.87433}
+# coordinate_keys rounds to 1e-3 degree, far below the spacing of the weather grid
+COORD_SCALE = 1000
+
+
+def _radius(unit):
+    if unit not in EARTH_RADIUS:
+        raise ValueError("unit for distance calculation not defined")
+    return EARTH_RADIUS[unit]
+
+
+def coordinate_keys(latitude, longitude):
+    """
+    One int64 key per (latitude, longitude) point, for looking up points by
+    exact coordinate; points equal to 1e-3 degree share a key, whether they
+    were read as float32 or float64. Keys sort by latitude, then longitude.
+    """
+    lat_key = np.rint(np.asarray(latitude, dtype=np.float64) * COORD_SCALE).astype(np.int64)
+    lon_key = np.rint(np.asarray(longitude, dtype=np.float64) * COORD_SCALE).astype(np.int64)
+    return lat_key * 1_000_000 + lon_key
+
+
+def haversine_array(lng1, lat1, lng2, lat2, unit="m"):
+    """Great-circle distance between (lng1, lat1) and (lng2, lat2); inputs broadcast like numpy arrays."""
+    lng1, lat1, lng2, lat2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lng1, lat1, lng2, lat2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * _radius(unit) * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def haversine_matrix(lng_a, lat_a, lng_b=None, lat_b=None, unit="m"):
+    """(len(a), len(b)) matrix of distances between every pair of points; b defaults to a."""
+    lng_a, lat_a = np.asarray(lng_a, dtype=np.float64), np.asarray(lat_a, dtype=np.float64)
+    if lng_b is None:
+        lng_b, lat_b = lng_a, lat_a
+    lng_b, lat_b = np.asarray(lng_b, dtype=np.float64), np.asarray(lat_b, dtype=np.float64)
+    return haversine_array(lng_a[:, None], lat_a[:, None], lng_b[None, :], lat_b[None, :], unit)
+
+
+def _unit_vectors(lng, lat):
+    lng, lat = np.radians(np.asarray(lng, dtype=np.float64)), np.radians(np.asarray(lat, dtype=np.float64))
+    return np.column_stack([np.cos(lat) * np.cos(lng), np.cos(lat) * np.sin(lng), np.sin(lat)])
+
+
+def nearest_neighbors(query_lng, query_lat, ref_lng, ref_lat, k=1, unit="m", exclude_self=False):
+    """
+    The k nearest reference points of every query point by great-circle distance.
+
+    The points are placed on the unit sphere, where the straight-line (chord)
+    distance orders neighbours exactly like the great-circle distance, so a
+    scipy KD-tree answers the query. With exclude_self the query points are
+    the reference points and a point is not its own neighbour.
+    Returns (indices, distances), both shaped (n_queries, k).
+    """
+    from scipy.spatial import cKDTree
+
+    tree = cKDTree(_unit_vectors(ref_lng, ref_lat))
+    n_neighbors = k + 1 if exclude_self else k
+    chord, index = tree.query(_unit_vectors(query_lng, query_lat), k=n_neighbors)
+    chord, index = chord.reshape(len(chord), -1), index.reshape(len(index), -1)
+    if exclude_self:
+        # the point itself normally comes first, but ties with duplicates may reorder it
+        is_self = index == np.arange(len(index))[:, None]
+        is_self[is_self.sum(axis=1) == 0, -1] = True
+        keep = ~is_self
+        chord = chord[keep].reshape(len(chord), k)
+        index = index[keep].reshape(len(index), k)
+    distance = 2 * _radius(unit) * np.arcsin(np.clip(chord / 2, 0.0, 1.0))
+    return index, distance
+
+
+def candidate_pairs(geometries, ids=None, predicate="intersects", chunk_size=50_000):
+    """
+    Index pairs (left < right) of geometries that satisfy predicate, found with
+    an STRtree. Self-pairs and mirrored pairs never reach the exact test; with
+    ids, pairs of parts that share an id (e.g. one osm_id split in pieces) are
+    dropped too. Queries run chunk_size geometries at a time to bound memory.
+    """
+    import shapely
+
+    geometries = np.asarray(geometries, dtype=object)
+    ids = np.asarray(ids) if ids is not None else None
+    tree = shapely.STRtree(geometries)
+    lefts, rights = [], []
+    for start in range(0, len(geometries), chunk_size):
+        # bounding-box candidates first, so the exact predicate only runs on left < right
+        left, right = tree.query(geometries[start : start + chunk_size])
+        left = left + start
+        keep = left < right
+        if ids is not None:
+            keep &= ids[left] != ids[right]
+        left, right = left[keep], right[keep]
+        if predicate is not None:
+            hit = getattr(shapely, predicate)(geometries[left], geometries[right])
+            left, right = left[hit], right[hit]
+        lefts.append(left)
+        rights.append(right)
+    left = np.concatenate(lefts) if lefts else np.empty(0, dtype=np.int64)
+    right = np.concatenate(rights) if rights else np.empty(0, dtype=np.int64)
+    return left, right
+
+
+def find_intersections(geometries, ids=None, points_only=False, chunk_size=50_000):
+    """
+    Intersections between every pair of distinct geometries, like
+    `layer.overlay(layer, how="intersection")` without the self-matches and
+    with each pair listed once.
+
+    Returns a DataFrame with the positional indices (left, right), the ids
+    (id_1, id_2) when given and the intersection geometry. With points_only,
+    multi-part results are split and only the Point parts (the crossings) are kept.
+    """
+    import shapely
+
+    geometries = np.asarray(geometries, dtype=object)
+    left, right = candidate_pairs(geometries, ids, chunk_size=chunk_size)
+    geometry = shapely.intersection(geometries[left], geometries[right])
+
+    if points_only:
+        parts, part_of = shapely.get_parts(geometry, return_index=True)
+        is_point = shapely.get_type_id(parts) == shapely.GeometryType.POINT
+        left, right, geometry = left[part_of[is_point]], right[part_of[is_point]], parts[is_point]
+
+    out = pd.DataFrame({"left": left, "right": right})
+    if ids is not None:
+        ids = np.asarray(ids)
+        out["id_1"] = ids[left]
+        out["id_2"] = ids[right]
+    out["geometry"] = geometry
+    return out
+
+
+def road_intersections(streets, id_column="osm_id", points_only=True):
+    """find_intersections on a GeoDataFrame, returned as a GeoDataFrame in the streets' CRS."""
+    import geopandas as gpd
+
+    found = find_intersections(
+        streets.geometry.to_numpy(), ids=streets[id_column].to_numpy(), points_only=points_only
+    )
+    found = found.rename(columns={"id_1": f"{id_column}_1", "id_2": f"{id_column}_2"})
+    return gpd.GeoDataFrame(found, geometry="geometry", crs=streets.crs)
@@ -0,0 +1,170 @@
+"""
+Precomputed solar positions for the fixed Enefit weather-station grid.
+
+The weather grid never changes and the solar geometry only depends on the
+station, the day of year and the clock hour, so the angles are computed once
+into (station, day_of_year, hour) arrays, saved as an .npz file and looked up
+by integer indexing afterwards. Points that are not on the grid fall back to
+calculate_angles_array.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from .geo import coordinate_keys
+from .solar_tracking import _as_array, _as_datetime64, calculate_angles_array, day_of_year_array
+
+
+TABLE_VERSION = 1
+DAYS_IN_TABLE = 366
+HOURS_IN_TABLE = 24
+
+
+class SolarPositionTable:
+    """
+    azimuth/elevation are float32 arrays of shape (n_stations, 366, 24); the
+    hour axis is the clock hour of local_time, minutes are ignored.
+    """
+
+    def __init__(self, latitude, longitude, azimuth, elevation, utc_offset=2):
+        self.latitude = np.asarray(latitude, dtype=np.float64)
+        self.longitude = np.asarray(longitude, dtype=np.float64)
+        self.azimuth = azimuth
+        self.elevation = elevation
+        self.utc_offset = utc_offset
+
+        keys = coordinate_keys(self.latitude, self.longitude)
+        self._key_order = np.argsort(keys, kind="stable")
+        self._sorted_keys = keys[self._key_order]
+
+    @classmethod
+    def build(cls, latitude, longitude, utc_offset=2):
+        latitude = _as_array(latitude)
+        longitude = _as_array(longitude)
+        n_stations = latitude.shape[0]
+
+        # Only the time of day of local_time matters once day_of_year is
+        # passed explicitly, so any date works as the anchor.
+        hours = np.arange(HOURS_IN_TABLE).astype("timedelta64[h]")
+        local_time = np.datetime64("2000-01-01T00:00:00", "us") + hours
+        day_of_year = np.arange(1, DAYS_IN_TABLE + 1)
+
+        shape = (n_stations, DAYS_IN_TABLE, HOURS_IN_TABLE)
+        azimuth, elevation = calculate_angles_array(
+            np.broadcast_to(local_time[None, None, :], shape),
+            np.broadcast_to(day_of_year[None, :, None], shape),
+            np.broadcast_to(longitude[:, None, None], shape),
+            np.broadcast_to(latitude[:, None, None], shape),
+            utc_offset,
+        )
+        return cls(latitude, longitude, azimuth.astype(np.float32), elevation.astype(np.float32), utc_offset)
+
+    @classmethod
+    def from_station_mapping(cls, mapping_path, utc_offset=2):
+        stations = (
+            pd.read_csv(mapping_path, usecols=["latitude", "longitude"])
+            .dropna()
+            .drop_duplicates()
+            .sort_values(["latitude", "longitude"])
+        )
+        return cls.build(stations["latitude"], stations["longitude"], utc_offset)
+
+    def save(self, path):
+        np.savez(
+            path,
+            version=np.int64(TABLE_VERSION),
+            utc_offset=np.int64(self.utc_offset),
+            latitude=self.latitude,
+            longitude=self.longitude,
+            azimuth=self.azimuth,
+            elevation=self.elevation,
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            if int(data["version"]) != TABLE_VERSION:
+                raise ValueError(f"{path} was written by an incompatible table version")
+            return cls(
+                data["latitude"],
+                data["longitude"],
+                data["azimuth"],
+                data["elevation"],
+                int(data["utc_offset"]),
+            )
+
+    @classmethod
+    def load_or_build(cls, mapping_path, cache_path=None, utc_offset=2):
+        """
+        Reuses the cached table when it was built for the same stations and
+        utc_offset, otherwise rebuilds it and overwrites the cache.
+        """
+        if cache_path is None:
+            cache_path = os.path.join(os.path.dirname(os.path.abspath(mapping_path)), f"solar_position_table_utc{utc_offset}.npz")
+
+        if os.path.exists(cache_path):
+            try:
+                table = cls.load(cache_path)
+            except (OSError, KeyError, ValueError):
+                table = None
+            if table is not None and table.utc_offset == utc_offset:
+                stations = pd.read_csv(mapping_path, usecols=["latitude", "longitude"]).dropna().drop_duplicates()
+                if table.covers(stations["latitude"], stations["longitude"]).all():
+                    return table
+
+        table = cls.from_station_mapping(mapping_path, utc_offset)
+        table.save(cache_path)
+        return table
+
+    def station_index(self, latitude, longitude):
+        """
+        Index of each point in the table, -1 for points not on the grid.
+        """
+        keys = coordinate_keys(latitude, longitude)
+        if self._sorted_keys.size == 0:
+            return np.full(keys.shape, -1, dtype=np.int64)
+        pos = np.searchsorted(self._sorted_keys, keys)
+        pos = np.minimum(pos, self._sorted_keys.size - 1)
+        found = self._sorted_keys[pos] == keys
+        return np.where(found, self._key_order[pos], -1)
+
+    def covers(self, latitude, longitude):
+        return self.station_index(latitude, longitude) >= 0
+
+    def lookup(self, local_time, longitude, latitude, day_of_year=None):
+        """
+        Returns (azimuth, elevation) for each row, same argument order as
+        calculate_angles_array. Rows off the grid are computed directly.
+        """
+        local_time = _as_datetime64(local_time)
+        longitude, latitude = np.broadcast_arrays(_as_array(longitude), _as_array(latitude))
+        local_time = np.broadcast_to(local_time, longitude.shape)
+        if day_of_year is None:
+            day_of_year = day_of_year_array(local_time)
+        day_of_year = np.broadcast_to(_as_array(day_of_year, dtype=np.int64), longitude.shape)
+        hour = (local_time - local_time.astype("datetime64[D]")).astype("timedelta64[h]").astype(np.int64)
+
+        station = self.station_index(latitude, longitude)
+        on_grid = station >= 0
+
+        azimuth = np.empty(longitude.shape, dtype=np.float32)
+        elevation = np.empty(longitude.shape, dtype=np.float32)
+        idx = (station[on_grid], day_of_year[on_grid] - 1, hour[on_grid])
+        azimuth[on_grid] = self.azimuth[idx]
+        elevation[on_grid] = self.elevation[idx]
+
+        if not on_grid.all():
+            off_grid = ~on_grid
+            # truncate to the hour so off-grid rows agree with the table convention
+            off_azimuth, off_elevation = calculate_angles_array(
+                local_time[off_grid].astype("datetime64[h]"),
+                day_of_year[off_grid],
+                longitude[off_grid],
+                latitude[off_grid],
+                self.utc_offset,
+            )
+            azimuth[off_grid] = off_azimuth
+            elevation[off_grid] = off_elevation
+
+        return azimuth, elevation
@@ -2,8 +2,11 @@
 # coding: utf-8
 
 import math
+import time
 import datetime
 
+import numpy as np
+
 # Solar Tracking Helpers
 
 
@@ -147,3 +150,185 @@ def calculate_irradiation_on_surface(elevation, tilt, direct_irradiation, albedo
     incident_irradiation = direct_irradiation * math.sin(math.radians(elevation))
     panel_irradiation = incident_irradiation * math.sin(math.radians(tilt + elevation))
     return panel_irradiation
+
+
+# Vectorized Solar Tracking Helpers
+#
+# Array counterparts of the scalar helpers above. Each accepts NumPy arrays or
+# pandas/polars columns (or plain scalars, which broadcast) and reproduces the
+# scalar formulas term for term so the numbers match row by row.
+
+def _as_array(values, dtype=float):
+    if hasattr(values, "to_numpy"):
+        values = values.to_numpy()
+    return np.asarray(values, dtype=dtype)
+
+
+def _as_datetime64(values):
+    if hasattr(values, "to_numpy"):
+        values = values.to_numpy()
+    return np.asarray(values, dtype="datetime64[us]")
+
+
+def _cycle_offset(cycle_start):
+    if cycle_start == 'spring':
+        return -81
+    elif cycle_start == 'autumn':
+        return 284
+    return 10
+
+
+def day_of_year_array(local_time):
+    """ 1-based ordinal day, same as datetime.timetuple().tm_yday
+    """
+    local_time = _as_datetime64(local_time)
+    days = local_time.astype("datetime64[D]") - local_time.astype("datetime64[Y]")
+    return days.astype(np.int64) + 1
+
+
+def calculate_declination_array(day_of_year, cycle_start=None):
+    day_of_year = _as_array(day_of_year)
+    relative_angle = (day_of_year + _cycle_offset(cycle_start)) / 365.25 * 360
+    return -23.45 * np.cos(np.radians(relative_angle))
+
+
+def equation_of_time_array(day_of_year, cycle_start='spring'):
+    day_of_year = _as_array(day_of_year)
+    B = 2 * math.pi * (day_of_year + _cycle_offset(cycle_start)) / 365.25
+    return 9.87 * np.sin(2*B) - 7.53 * np.cos(B) - 1.5 * np.sin(B)
+
+
+def time_correction_factor_array(day_of_year, longitude, utc_offset=None):
+    longitude = _as_array(longitude)
+    if utc_offset is None:
+        # np.round rounds half to even, matching the builtin round() above
+        utc_offset = np.round(longitude / 15)
+    else:
+        utc_offset = _as_array(utc_offset)
+
+    LSTM = local_standard_time_meridian(utc_offset)
+    EoT = equation_of_time_array(day_of_year)
+    return 4 * (longitude - LSTM) + EoT
+
+
+def hour_angle_array(local_time, day_of_year, longitude, utc_offset=None):
+    """
+    Shifts the clock time by the time correction in whole microseconds (as
+    datetime.timedelta does) and drops sub-second precision the same way the
+    scalar version reads LST.hour/minute/second.
+    """
+    local_time = _as_datetime64(local_time)
+    TC = time_correction_factor_array(day_of_year, longitude, utc_offset)
+
+    micros_of_day = (local_time - local_time.astype("datetime64[D]")).astype(np.int64)
+    shifted = micros_of_day + np.rint(TC * 60e6).astype(np.int64)
+    seconds = np.floor_divide(shifted, 1_000_000) % 86400
+
+    LST_value = seconds // 3600 + (seconds % 3600 // 60) / 60 + (seconds % 60) / 3600
+    return 15 * (LST_value - 12)
+
+
+def calculate_elevation_angle_array(local_time, day_of_year, longitude, latitude, utc_offset=None):
+    """
+    Out of range rows come back as NaN instead of raising.
+    """
+    if day_of_year is None:
+        day_of_year = day_of_year_array(local_time)
+    latitude = _as_array(latitude)
+    HRA = hour_angle_array(local_time, day_of_year, longitude, utc_offset)
+    deca = calculate_declination_array(day_of_year)
+
+    sines = np.sin(np.radians(deca)) * np.sin(np.radians(latitude))
+    cosines = np.cos(np.radians(latitude)) * np.cos(np.radians(latitude)) * np.cos(np.radians(HRA))
+    with np.errstate(invalid='ignore'):
+        return np.degrees(np.arcsin(sines + cosines))
+
+
+def calculate_angles_array(local_time, day_of_year, longitude, latitude, utc_offset=None):
+    """
+    Returns (azimuth, elevation) arrays. Like the scalar version, the elevation
+    is computed with the default utc_offset.
+    """
+    if day_of_year is None:
+        day_of_year = day_of_year_array(local_time)
+    latitude = _as_array(latitude)
+    HRA = hour_angle_array(local_time, day_of_year, longitude, utc_offset)
+    deca = calculate_declination_array(day_of_year)
+    elevation = calculate_elevation_angle_array(local_time, day_of_year, longitude, latitude)
+
+    first_term = np.sin(np.radians(deca)) * np.cos(np.radians(latitude))
+    second_term = np.cos(np.radians(deca)) * np.sin(np.radians(latitude)) * np.cos(np.radians(HRA))
+
+    denom = np.cos(np.radians(elevation))
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        azimuth = np.degrees(np.arccos((first_term-second_term)/denom))
+    return azimuth, elevation
+
+
+def when_is_daylight_array(day_of_year, longitude, latitude, utc_offset=None):
+    """
+    Returns (sunrise, sunset) as decimal hours; convert_int_to_time turns a
+    single value into the datetime.time the scalar version returns.
+    """
+    latitude = _as_array(latitude)
+    deca = calculate_declination_array(day_of_year)
+    sines_numerator = -1 * np.sin(np.radians(latitude)) * np.sin(np.radians(deca))
+    cosines_denom = np.cos(np.radians(latitude)) * np.cos(np.radians(deca))
+    with np.errstate(invalid='ignore'):
+        res = np.degrees(np.arccos(sines_numerator/cosines_denom))
+    TC = time_correction_factor_array(day_of_year, longitude, utc_offset)
+
+    sunrise = 12 - res/15 - TC/60
+    sunset = 12 + res/15 - TC/60
+    return sunrise, sunset
+
+
+def calculate_irradiation_on_surface_array(elevation, tilt, direct_irradiation, albedo = 0):
+    elevation = _as_array(elevation)
+    tilt = _as_array(tilt)
+    incident_irradiation = _as_array(direct_irradiation) * np.sin(np.radians(elevation))
+    return incident_irradiation * np.sin(np.radians(tilt + elevation))
+
+
+def benchmark_angles(n_rows=100_000, seed=0):
+    """
+    Times calculate_angles row by row against calculate_angles_array on a
+    synthetic hourly grid over Estonia and checks both agree.
+    """
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2022-01-01T00:00:00", "us")
+    local_time = start + rng.integers(0, 2 * 365 * 24, n_rows).astype("timedelta64[h]")
+    longitude = rng.uniform(21.7, 28.2, n_rows).round(1)
+    latitude = rng.uniform(57.6, 59.7, n_rows).round(1)
+    day_of_year = day_of_year_array(local_time)
+    times = local_time.astype(datetime.datetime)
+
+    t0 = time.perf_counter()
+    scalar = [
+        calculate_angles(times[i], int(day_of_year[i]), longitude[i], latitude[i], utc_offset=2)
+        for i in range(n_rows)
+    ]
+    scalar_seconds = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    azimuth, elevation = calculate_angles_array(local_time, day_of_year, longitude, latitude, utc_offset=2)
+    array_seconds = time.perf_counter() - t0
+
+    scalar = np.asarray(scalar)
+    max_abs_diff = float(np.nanmax(np.abs(np.column_stack([azimuth, elevation]) - scalar)))
+    return {
+        "rows": n_rows,
+        "scalar_seconds": scalar_seconds,
+        "array_seconds": array_seconds,
+        "speedup": scalar_seconds / array_seconds,
+        "max_abs_diff": max_abs_diff,
+    }
+
+
+if __name__ == "__main__":
+    import sys
+
+    result = benchmark_angles(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
+    for key, value in result.items():
+        print(f"{key}: {value}")
@@ -0,0 +1,95 @@
+"""
+Weather features for the Enefit feature pipeline, joined on grid_cell_id.
+
+FeaturesGenerator._add_forecast_weather_features and
+_add_historical_weather_features attach counties to the weather tables by
+joining on float latitude/longitude against weather_station_to_county_mapping.csv.
+WeatherFeatures builds the same columns (country-wide means per datetime,
+county-local means per county and datetime, at the same lags and with the
+same suffixes) from a DataStorage created with a WeatherGrid, whose weather
+tables already carry the integer grid_cell_id.
+"""
+import polars as pl
+
+
+FORECAST_LAGS_H = [0, 7 * 24]
+HISTORICAL_LAGS_H = [2 * 24, 7 * 24]
+# the 24 h historical lag only keeps the hours already published by 10:00
+HISTORICAL_MORNING_LAGS_H = [1 * 24]
+COORDINATE_COLUMNS = ["latitude", "longitude", "grid_cell_id"]
+
+
+class WeatherFeatures:
+    def __init__(self, data_storage, max_offshore_km=0.0):
+        """
+        data_storage: utils.data_storage.DataStorage with a weather_grid.
+        Grid points farther offshore than max_offshore_km are left out of the
+        county-local means, as weather_station_to_county_mapping.csv leaves
+        points outside every county unmapped; the default keeps only points
+        inside a county.
+        """
+        if data_storage.weather_grid is None:
+            raise ValueError("WeatherFeatures needs a DataStorage created with a weather_grid")
+        self.data_storage = data_storage
+        self.df_grid_cell_to_county = data_storage.weather_grid.county_mapping(max_offshore_km)
+
+    def _with_county(self, df_weather):
+        return df_weather.join(self.df_grid_cell_to_county, on="grid_cell_id", how="left").drop(COORDINATE_COLUMNS)
+
+    @staticmethod
+    def _date_and_local(df_weather):
+        df_date = df_weather.group_by("datetime").mean().drop("county")
+        df_local = df_weather.filter(pl.col("county").is_not_null()).group_by("county", "datetime").mean()
+        return df_date, df_local
+
+    @staticmethod
+    def _join_lagged(df_features, df_date, df_local, hours_lag, suffix):
+        df_features = df_features.join(
+            df_date.with_columns(pl.col("datetime") + pl.duration(hours=hours_lag)),
+            on="datetime",
+            how="left",
+            suffix=f"_{suffix}_{hours_lag}h",
+        )
+        return df_features.join(
+            df_local.with_columns(pl.col("datetime") + pl.duration(hours=hours_lag)),
+            on=["county", "datetime"],
+            how="left",
+            suffix=f"_{suffix}_local_{hours_lag}h",
+        )
+
+    def add_forecast_weather_features(self, df_features):
+        df_forecast_weather = self._with_county(
+            self.data_storage.df_forecast_weather.rename({"forecast_datetime": "datetime"})
+            # FeaturesGenerator writes (hours_ahead >= 22) & hours_ahead <= 45, which
+            # parses as ((...) & hours_ahead) <= 45 and is rejected by current polars
+            .filter(pl.col("hours_ahead").is_between(22, 45))
+            .drop("hours_ahead")
+        )
+        df_date, df_local = self._date_and_local(df_forecast_weather)
+        for hours_lag in FORECAST_LAGS_H:
+            df_features = self._join_lagged(df_features, df_date, df_local, hours_lag, "forecast")
+        return df_features
+
+    def add_historical_weather_features(self, df_features):
+        df_historical_weather = self._with_county(self.data_storage.df_historical_weather)
+        df_date, df_local = self._date_and_local(df_historical_weather)
+        for hours_lag in HISTORICAL_LAGS_H:
+            df_features = self._join_lagged(df_features, df_date, df_local, hours_lag, "historical")
+
+        for hours_lag in HISTORICAL_MORNING_LAGS_H:
+            df_features = df_features.join(
+                df_date.with_columns(
+                    pl.col("datetime") + pl.duration(hours=hours_lag),
+                    pl.col("datetime").dt.hour().alias("hour"),
+                )
+                .filter(pl.col("hour") <= 10)
+                .drop("hour"),
+                on="datetime",
+                how="left",
+                suffix=f"_historical_{hours_lag}h",
+            )
+        return df_features
+
+    def add_features(self, df_features):
+        df_features = self.add_forecast_weather_features(df_features)
+        return self.add_historical_weather_features(df_features)
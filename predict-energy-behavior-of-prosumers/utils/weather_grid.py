@@ -0,0 +1,241 @@
+"""
+Weather grid -> county resolution for the Enefit weather features.
+
+The forecast and historical weather tables share one fixed lat/lon grid. The
+feature code used to attach counties by joining on float latitude/longitude
+against the rounded weather_station_to_county_mapping.csv, at every inference
+step. WeatherGrid resolves every grid point to a county once (point in polygon
+on the estonia.gpkg counties, nearest county for points offshore), numbers the
+points with a dense integer grid_cell_id and saves the result, so the feature
+stages join on that integer instead.
+"""
+import json
+import os
+
+import numpy as np
+import polars as pl
+
+from .geo import coordinate_keys, haversine_array
+
+
+GRID_VERSION = 1
+# the latitude/longitude of the weather files are WGS84
+WEATHER_CRS = "EPSG:4326"
+
+
+def _normalize_county_name(name):
+    # "Lääne-Viru maakond" -> "LÄÄNE-VIRUMAA", the spelling of county_id_to_name_map.json
+    name = str(name).upper().replace(" MAAKOND", "").replace(" ", "")
+    return name if name.endswith("MAA") else name + "MAA"
+
+
+def _read_county_map(county_map_path):
+    with open(county_map_path, encoding="utf-8") as f_open:
+        return {name: int(county_id) for county_id, name in json.load(f_open).items()}
+
+
+def county_ids_from_names(names, county_map_path):
+    id_by_name = _read_county_map(county_map_path)
+    normalized = [_normalize_county_name(name) for name in names]
+    unknown = sorted({name for name in normalized if name not in id_by_name})
+    if unknown:
+        raise ValueError(f"County names not in {county_map_path}: {unknown}")
+    return np.array([id_by_name[name] for name in normalized], dtype=np.int32)
+
+
+def county_ids_from_layer(counties, county_map_path):
+    """
+    County ids of every row of the counties layer, from the one column whose
+    values are all county ids or county names of county_id_to_name_map.json.
+    Raises when no column or several disagreeing columns match.
+    """
+    from pandas.api.types import is_integer_dtype
+
+    id_by_name = _read_county_map(county_map_path)
+    known_ids = set(id_by_name.values())
+    matches = {}
+    for column in counties.columns:
+        values = counties[column]
+        if column == counties.geometry.name or values.isna().any():
+            continue
+        if is_integer_dtype(values):
+            if set(values.tolist()) <= known_ids:
+                matches[column] = values.to_numpy(dtype=np.int32)
+        elif values.map(lambda v: isinstance(v, str)).all():
+            normalized = [_normalize_county_name(name) for name in values]
+            if all(name in id_by_name for name in normalized):
+                matches[column] = np.array([id_by_name[name] for name in normalized], dtype=np.int32)
+
+    if not matches:
+        raise ValueError(f"No column of the counties layer matches {county_map_path}; pass county_column")
+    columns = list(matches)
+    if any(not np.array_equal(matches[columns[0]], matches[c]) for c in columns[1:]):
+        raise ValueError(f"Columns {columns} all match {county_map_path} but disagree; pass county_column")
+    return matches[columns[0]]
+
+
+def grid_points(*frames):
+    """Distinct (latitude, longitude) pairs across polars frames with those columns."""
+    points = pl.concat(
+        [df.select(pl.col("latitude").cast(pl.Float64), pl.col("longitude").cast(pl.Float64)) for df in frames]
+    ).drop_nulls()
+    keys = coordinate_keys(points.get_column("latitude").to_numpy(), points.get_column("longitude").to_numpy())
+    _, first = np.unique(keys, return_index=True)
+    points = points[first]
+    return points.get_column("latitude").to_numpy(), points.get_column("longitude").to_numpy()
+
+
+class WeatherGrid:
+    """
+    Grid points sorted by coordinate; grid_cell_id is the position in that
+    order. offshore_km is 0 inside a county and the distance to the assigned
+    (nearest) county otherwise.
+    """
+
+    def __init__(self, latitude, longitude, county, offshore_km):
+        latitude = np.asarray(latitude, dtype=np.float64)
+        longitude = np.asarray(longitude, dtype=np.float64)
+        keys = coordinate_keys(latitude, longitude)
+        order = np.argsort(keys, kind="stable")
+        if np.any(np.diff(keys[order]) == 0):
+            raise ValueError("WeatherGrid points must be unique")
+
+        self.keys = keys[order]
+        self.latitude = latitude[order]
+        self.longitude = longitude[order]
+        self.county = np.asarray(county, dtype=np.int32)[order]
+        self.offshore_km = np.asarray(offshore_km, dtype=np.float32)[order]
+
+    def __len__(self):
+        return self.keys.size
+
+    @classmethod
+    def build(cls, latitude, longitude, county_polygons, county_ids):
+        """county_polygons: shapely (Multi)Polygons in lon/lat, county_ids: their integer county."""
+        import shapely
+
+        latitude = np.asarray(latitude, dtype=np.float64)
+        longitude = np.asarray(longitude, dtype=np.float64)
+        polygons = np.asarray(county_polygons, dtype=object)
+        county_ids = np.asarray(county_ids, dtype=np.int32)
+        points = shapely.points(longitude, latitude)
+
+        county = np.full(points.size, -1, dtype=np.int32)
+        offshore_km = np.zeros(points.size, dtype=np.float32)
+
+        tree = shapely.STRtree(polygons)
+        point_idx, polygon_idx = tree.query(points, predicate="within")
+        # a point on a shared border matches both counties; the first one wins
+        point_idx, first = np.unique(point_idx, return_index=True)
+        county[point_idx] = county_ids[polygon_idx[first]]
+
+        offshore = np.flatnonzero(county < 0)
+        if offshore.size:
+            near_point, near_polygon = tree.query_nearest(points[offshore], all_matches=False)
+            offshore = offshore[near_point]
+            county[offshore] = county_ids[near_polygon]
+            lines = shapely.shortest_line(points[offshore], polygons[near_polygon])
+            ends = shapely.get_coordinates(lines).reshape(-1, 2, 2)
+            offshore_km[offshore] = haversine_array(
+                ends[:, 0, 0], ends[:, 0, 1], ends[:, 1, 0], ends[:, 1, 1], unit="km"
+            )
+        return cls(latitude, longitude, county, offshore_km)
+
+    @classmethod
+    def from_gpkg(cls, latitude, longitude, gpkg_path, county_map_path, layer="counties", county_column=None):
+        """
+        Builds the grid from the estonia.gpkg counties layer. county_column holds
+        either the integer county id or the county name (matched against
+        county_id_to_name_map.json); by default it is the column whose values
+        all match that map, see county_ids_from_layer.
+        """
+        import geopandas as gpd
+        from pandas.api.types import is_integer_dtype
+
+        counties = gpd.read_file(gpkg_path, layer=layer)
+        if counties.crs is None:
+            counties = counties.set_crs(WEATHER_CRS)
+        else:
+            counties = counties.to_crs(WEATHER_CRS)
+
+        if county_column is None:
+            county_ids = county_ids_from_layer(counties, county_map_path)
+            return cls.build(latitude, longitude, counties.geometry.to_numpy(), county_ids)
+        values = counties[county_column]
+        if is_integer_dtype(values):
+            county_ids = values.to_numpy(dtype=np.int32)
+        else:
+            county_ids = county_ids_from_names(values.tolist(), county_map_path)
+        return cls.build(latitude, longitude, counties.geometry.to_numpy(), county_ids)
+
+    def save(self, path):
+        np.savez(
+            path,
+            version=np.int64(GRID_VERSION),
+            latitude=self.latitude,
+            longitude=self.longitude,
+            county=self.county,
+            offshore_km=self.offshore_km,
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            if int(data["version"]) != GRID_VERSION:
+                raise ValueError(f"{path} was written by an incompatible grid version")
+            return cls(data["latitude"], data["longitude"], data["county"], data["offshore_km"])
+
+    @classmethod
+    def load_or_build(cls, cache_path, latitude, longitude, gpkg_path, county_map_path, **kwargs):
+        """Reuses the cached grid when it covers every point, otherwise rebuilds and overwrites it."""
+        if os.path.exists(cache_path):
+            try:
+                grid = cls.load(cache_path)
+            except (OSError, KeyError, ValueError):
+                grid = None
+            if grid is not None and (grid.grid_cell_ids(latitude, longitude) >= 0).all():
+                return grid
+
+        grid = cls.from_gpkg(latitude, longitude, gpkg_path, county_map_path, **kwargs)
+        grid.save(cache_path)
+        return grid
+
+    def grid_cell_ids(self, latitude, longitude):
+        """int32 grid_cell_id of every point; -1 for points that are not on the grid."""
+        keys = coordinate_keys(latitude, longitude)
+        pos = np.minimum(np.searchsorted(self.keys, keys), self.keys.size - 1)
+        return np.where(self.keys[pos] == keys, pos, -1).astype(np.int32)
+
+    @property
+    def table(self):
+        return pl.DataFrame(
+            {
+                "grid_cell_id": np.arange(len(self), dtype=np.int32),
+                "latitude": self.latitude.astype(np.float32),
+                "longitude": self.longitude.astype(np.float32),
+                "county": self.county,
+                "offshore_km": self.offshore_km,
+            }
+        )
+
+    def county_mapping(self, max_offshore_km=None):
+        """
+        grid_cell_id -> county, the table the weather features join on. With
+        max_offshore_km, points farther offshore than that get a null county.
+        """
+        mapping = self.table
+        if max_offshore_km is not None:
+            mapping = mapping.with_columns(
+                pl.when(pl.col("offshore_km") <= max_offshore_km).then(pl.col("county")).alias("county")
+            )
+        return mapping.select("grid_cell_id", "county")
+
+    def add_grid_cell_id(self, df, drop_coordinates=False):
+        """Adds grid_cell_id (Int32, null off the grid) to a polars frame with latitude/longitude."""
+        ids = self.grid_cell_ids(df.get_column("latitude").to_numpy(), df.get_column("longitude").to_numpy())
+        df = df.with_columns(
+            pl.Series("grid_cell_id", ids, dtype=pl.Int32).replace(-1, None)
+        )
+        if drop_coordinates:
+            df = df.drop("latitude", "longitude")
+        return df
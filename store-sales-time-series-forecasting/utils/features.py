@@ -0,0 +1,214 @@
+"""
+Long-format feature pipeline for the Favorita store-sales series.
+
+Every (store_nbr, family) series shares one daily calendar, so the features
+are built on three small tables instead of row by row: deterministic terms per
+date (trend, calendar, annual/weekly Fourier), holiday flags per (store, date)
+and the interpolated oil price per date. The long frame is the full series x
+date grid, sorted by (series_id, date), and each feature column is gathered
+from those tables with integer indexing. The deterministic terms depend only
+on the date range and are cached, so train/valid/test reuse them.
+"""
+import functools
+import os
+
+import numpy as np
+import pandas as pd
+
+
+SERIES_KEYS = ["store_nbr", "family"]
+# Ecuador's public sector wages are paid on the 15th and the last day of the month
+PAYDAYS = (15,)
+HOLIDAY_COLUMNS = ["national_holiday", "regional_holiday", "local_holiday", "event", "work_day", "day_off"]
+
+
+def daily_dates(start, end):
+    return pd.date_range(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize(), freq="D")
+
+
+def fourier_terms(phase, order, name):
+    """sin/cos(2 pi k phase) for k = 1..order; phase is the fraction of the period elapsed."""
+    k = np.arange(1, order + 1)
+    angle = 2 * np.pi * np.asarray(phase, dtype=np.float64)[:, None] * k[None, :]
+    columns = {}
+    for i in range(order):
+        columns[f"sin_{i + 1}_{name}"] = np.sin(angle[:, i])
+        columns[f"cos_{i + 1}_{name}"] = np.cos(angle[:, i])
+    return columns
+
+
+@functools.lru_cache(maxsize=8)
+def deterministic_terms(start, end, annual_order=4, weekly_order=0):
+    """
+    Terms that only depend on the date, one row per day of [start, end]:
+    const and trend (as DeterministicProcess(order=1), trend starting at 1 on
+    start), day of week/month, month, payday and the annual Fourier pairs of
+    CalendarFourier(freq="A", order=annual_order); weekly_order adds weekly
+    pairs on top of the day-of-week column. Cached per arguments; the
+    returned frame is shared, do not modify it.
+    """
+    dates = daily_dates(start, end)
+    day_of_year = dates.dayofyear.to_numpy() - 1
+    days_in_year = np.where(dates.is_leap_year, 366, 365)
+    day_of_week = dates.dayofweek.to_numpy()
+
+    columns = {
+        "const": np.ones(len(dates)),
+        "trend": np.arange(1, len(dates) + 1, dtype=np.float64),
+        "day_of_week": day_of_week,
+        "day_of_month": dates.day.to_numpy(),
+        "month": dates.month.to_numpy(),
+        "payday": np.isin(dates.day.to_numpy(), PAYDAYS) | dates.is_month_end,
+    }
+    columns.update(fourier_terms(day_of_year / days_in_year, annual_order, "year"))
+    if weekly_order:
+        columns.update(fourier_terms(day_of_week / 7, weekly_order, "week"))
+
+    terms = pd.DataFrame(columns, index=dates)
+    int_columns = ["day_of_week", "day_of_month", "month", "payday"]
+    terms[int_columns] = terms[int_columns].astype(np.int8)
+    float_columns = [c for c in terms.columns if c not in int_columns]
+    terms[float_columns] = terms[float_columns].astype(np.float32)
+    terms.index.name = "date"
+    return terms
+
+
+def interpolate_oil(oil, dates):
+    """
+    dcoilwtico on every date: linear in time between the quoted (business)
+    days, the first/last quote carried to dates outside them.
+    """
+    oil = oil.dropna(subset=["dcoilwtico"])
+    known = pd.to_datetime(oil["date"]).to_numpy(dtype="datetime64[D]").astype(np.int64)
+    order = np.argsort(known, kind="stable")
+    target = pd.DatetimeIndex(dates).to_numpy(dtype="datetime64[D]").astype(np.int64)
+    return np.interp(target, known[order], oil["dcoilwtico"].to_numpy(dtype=np.float64)[order]).astype(np.float32)
+
+
+def holiday_terms(holidays, stores, dates):
+    """
+    Holiday flags as int8 arrays of shape (n_stores, n_dates), rows in the
+    order of stores. Transferred holidays are ordinary days (their Transfer row
+    is the day off); a Work Day is a weekend day worked to make up a Bridge.
+    Regional holidays match the store's state, local ones its city.
+    """
+    dates = pd.DatetimeIndex(dates)
+    holidays = holidays.assign(date=pd.to_datetime(holidays["date"]))
+    holidays = holidays[holidays["date"].isin(dates) & ~holidays["transferred"].astype(bool)]
+    date_pos = dates.get_indexer(holidays["date"])
+    holiday_type = holidays["type"].to_numpy()
+    locale = holidays["locale"].to_numpy()
+    locale_name = holidays["locale_name"].to_numpy()
+
+    n_stores, n_dates = len(stores), len(dates)
+    flags = {name: np.zeros((n_stores, n_dates), dtype=np.int8) for name in HOLIDAY_COLUMNS}
+
+    day_off = np.isin(holiday_type, ["Holiday", "Transfer", "Additional", "Bridge"])
+    for name, is_locale in (("national_holiday", "National"), ("event", None)):
+        rows = holiday_type == "Event" if is_locale is None else day_off & (locale == is_locale)
+        flags[name][:, date_pos[rows]] = 1
+    flags["work_day"][:, date_pos[(holiday_type == "Work Day") & (locale == "National")]] = 1
+
+    for name, is_locale, store_column in (("regional_holiday", "Regional", "state"), ("local_holiday", "Local", "city")):
+        rows = day_off & (locale == is_locale)
+        store_names = stores[store_column].to_numpy()
+        # (holiday row, store) pairs where the locale matches the store
+        holiday_idx, store_idx = np.nonzero(locale_name[rows][:, None] == store_names[None, :])
+        flags[name][store_idx, date_pos[rows][holiday_idx]] = 1
+
+    weekend = (dates.dayofweek >= 5)[None, :]
+    any_holiday = flags["national_holiday"] | flags["regional_holiday"] | flags["local_holiday"]
+    flags["day_off"] = ((weekend | any_holiday.astype(bool)) & ~flags["work_day"].astype(bool)).astype(np.int8)
+    return flags
+
+
+def series_index(*frames):
+    """Sorted unique (store_nbr, family) pairs with a dense series_id."""
+    pairs = pd.concat([df[SERIES_KEYS] for df in frames], ignore_index=True).drop_duplicates()
+    pairs = pairs.sort_values(SERIES_KEYS, ignore_index=True)
+    pairs["store_nbr"] = pairs["store_nbr"].astype(np.int16)
+    pairs.insert(0, "series_id", np.arange(len(pairs), dtype=np.int32))
+    return pairs
+
+
+def build_features(train, test=None, oil=None, holidays=None, stores=None, annual_order=4, weekly_order=0):
+    """
+    The full (series, date) grid from the first train date to the last train
+    or test date, sorted by (series_id, date), with sales (NaN where there is
+    no row, e.g. every Dec 25th and the test horizon), onpromotion, the
+    deterministic terms and, when given, oil price and holiday flags.
+    test rows keep their id in the id column (-1 elsewhere).
+    """
+    frames = [train] if test is None else [train, test]
+    series = series_index(*frames)
+    observed = pd.concat(frames, ignore_index=True)
+    observed_dates = pd.to_datetime(observed["date"])
+    dates = daily_dates(observed_dates.min(), observed_dates.max())
+    n_series, n_dates = len(series), len(dates)
+
+    # scatter the observed rows into (series, date) matrices
+    series_pos = pd.MultiIndex.from_frame(series[SERIES_KEYS]).get_indexer(
+        pd.MultiIndex.from_arrays([observed["store_nbr"].astype(np.int16), observed["family"]])
+    )
+    date_pos = dates.get_indexer(observed_dates)
+    sales = np.full((n_series, n_dates), np.nan, dtype=np.float32)
+    onpromotion = np.zeros((n_series, n_dates), dtype=np.float32)
+    row_id = np.full((n_series, n_dates), -1, dtype=np.int64)
+    if "sales" in observed:
+        sales[series_pos, date_pos] = observed["sales"].to_numpy(dtype=np.float32)
+    onpromotion[series_pos, date_pos] = observed["onpromotion"].fillna(0).to_numpy(dtype=np.float32)
+    if test is not None:
+        n_train = len(train)
+        row_id[series_pos[n_train:], date_pos[n_train:]] = test["id"].to_numpy()
+
+    date_rows = np.tile(np.arange(n_dates), n_series)
+    series_rows = np.repeat(np.arange(n_series), n_dates)
+    out = {
+        "series_id": series["series_id"].to_numpy()[series_rows],
+        "store_nbr": series["store_nbr"].to_numpy()[series_rows],
+        "family": pd.Categorical(series["family"]).take(series_rows),
+        "date": dates[date_rows],
+        "id": row_id.ravel(),
+        "sales": sales.ravel(),
+        "onpromotion": onpromotion.ravel(),
+    }
+
+    terms = deterministic_terms(dates[0], dates[-1], annual_order, weekly_order)
+    for column in terms.columns:
+        out[column] = terms[column].to_numpy()[date_rows]
+
+    if oil is not None:
+        out["dcoilwtico"] = interpolate_oil(oil, dates)[date_rows]
+    if holidays is not None:
+        if stores is None:
+            raise ValueError("stores (stores.csv) is needed for the regional/local holidays")
+        stores = stores.assign(store_nbr=stores["store_nbr"].astype(np.int16)).set_index("store_nbr")
+        store_rows = stores.index.get_indexer(series["store_nbr"])[series_rows]
+        if (store_rows < 0).any():
+            raise ValueError("Some store_nbr values are missing from stores")
+        flags = holiday_terms(holidays, stores, dates)
+        for column in HOLIDAY_COLUMNS:
+            out[column] = flags[column][store_rows, date_rows]
+
+    return pd.DataFrame(out)
+
+
+def load_features(root=None, annual_order=4, weekly_order=0):
+    """build_features on the competition CSVs in root (default: the working directory)."""
+    root = os.getcwd() if root is None else root
+
+    def read(file_name, **kwargs):
+        return pd.read_csv(os.path.join(root, file_name), **kwargs)
+
+    dtypes = {"store_nbr": np.int16, "family": "category", "onpromotion": np.float32}
+    train = read("train.csv", dtype={**dtypes, "sales": np.float32}, parse_dates=["date"])
+    test = read("test.csv", dtype=dtypes, parse_dates=["date"])
+    return build_features(
+        train,
+        test,
+        oil=read("oil.csv", parse_dates=["date"]),
+        holidays=read("holidays_events.csv", parse_dates=["date"]),
+        stores=read("stores.csv"),
+        annual_order=annual_order,
+        weekly_order=weekly_order,
+    )
@@ -0,0 +1,289 @@
+"""
+Sharded, multi-process training of the store-sales hybrid model.
+
+The notebook's BoostedHybrid is fitted per series group: a LinearRegression
+on the deterministic terms for the trend and seasonality, then an XGBRegressor
+on the residuals. Here the (store_nbr, family) series are split into
+contiguous shards of series_id and every shard is fitted in a process pool:
+one multi-output LinearRegression over all series of the shard, then one
+XGBRegressor over the shard's long-format residuals.
+
+The long feature frame from utils.features is the full series x date grid, so
+sales and the residual features are written once as (n_series, n_dates[, k])
+.npy files and opened memory-mapped by every worker; a worker only reads the
+rows of the shard it is fitting. Workers return the forecast window only, so
+memory stays bounded by the shard size times the number of workers.
+
+Run it as a module from the competition folder, as it imports utils.features
+relatively:
+
+    python -m utils.training <data folder> --train-start 2017-01-01
+"""
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+TREND_COLUMN_PREFIXES = ("trend", "sin_", "cos_")
+RESIDUAL_COLUMNS = [
+    "store_nbr",
+    "family_code",
+    "onpromotion",
+    "dcoilwtico",
+    "day_of_week",
+    "day_of_month",
+    "month",
+    "payday",
+    "national_holiday",
+    "regional_holiday",
+    "local_holiday",
+    "event",
+    "work_day",
+    "day_off",
+]
+XGB_PARAMS = {"n_estimators": 200, "max_depth": 6, "learning_rate": 0.1, "subsample": 0.8, "tree_method": "hist"}
+
+# set in every worker by _init_worker
+_shared = {}
+
+
+def rmsle(y_true, y_pred):
+    y_true, y_pred = np.asarray(y_true, dtype=np.float64), np.asarray(y_pred, dtype=np.float64)
+    return float(np.sqrt(np.mean((np.log1p(y_pred) - np.log1p(y_true)) ** 2)))
+
+
+def make_shards(n_series, n_shards):
+    """n_shards contiguous (start, stop) ranges of series_id of near-equal size."""
+    bounds = np.linspace(0, n_series, min(n_shards, n_series) + 1).round().astype(int)
+    return list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+
+def trend_design(terms, annual=True):
+    """
+    Per-date design of the trend model: trend, day-of-week dummies (Monday is
+    the baseline, the intercept is fitted) and, with annual, the Fourier
+    pairs. Annual terms fitted on less than a year are collinear with the
+    trend and extrapolate wildly, so train_and_forecast only adds them on
+    longer windows.
+    """
+    prefixes = TREND_COLUMN_PREFIXES if annual else TREND_COLUMN_PREFIXES[:1]
+    columns = [c for c in terms.columns if c.startswith(prefixes)]
+    day_of_week = terms["day_of_week"].to_numpy()
+    dummies = (day_of_week[:, None] == np.arange(1, 7)[None, :]).astype(np.float32)
+    return np.hstack([terms[columns].to_numpy(dtype=np.float32), dummies])
+
+
+def write_shared_arrays(features, work_dir):
+    """
+    Writes sales (n_series, n_dates) and the residual features
+    (n_series, n_dates, k) as float32 .npy files for the workers to
+    memory-map, one column at a time. features must be sorted by (series_id,
+    date) over a full grid, as returned by utils.features.build_features.
+    Returns (paths, residual columns).
+    """
+    n_series = int(features["series_id"].max()) + 1
+    n_dates = len(features) // n_series
+    if n_series * n_dates != len(features):
+        raise ValueError("features is not a full (series, date) grid")
+
+    columns = [c for c in RESIDUAL_COLUMNS if c in features.columns or c == "family_code"]
+    paths = {
+        "sales": os.path.join(work_dir, "sales.npy"),
+        "residual_features": os.path.join(work_dir, "residual_features.npy"),
+    }
+    np.save(paths["sales"], features["sales"].to_numpy(dtype=np.float32).reshape(n_series, n_dates))
+    matrix = np.lib.format.open_memmap(
+        paths["residual_features"], mode="w+", dtype=np.float32, shape=(n_series, n_dates, len(columns))
+    )
+    for i, column in enumerate(columns):
+        values = features["family"].cat.codes if column == "family_code" else features[column]
+        matrix[:, :, i] = values.to_numpy(dtype=np.float32).reshape(n_series, n_dates)
+    matrix.flush()
+    del matrix
+    return paths, columns
+
+
+def _init_worker(paths, design, train_dates, forecast_dates, residual_model, xgb_params):
+    _shared["sales"] = np.load(paths["sales"], mmap_mode="r")
+    _shared["residual_features"] = np.load(paths["residual_features"], mmap_mode="r")
+    _shared["design"] = design
+    _shared["train_dates"] = train_dates
+    _shared["forecast_dates"] = forecast_dates
+    _shared["residual_model"] = residual_model
+    _shared["xgb_params"] = xgb_params
+
+
+def _fit_trend(design, train_dates, y):
+    """
+    Multi-output LinearRegression of y (n_train_dates, n_series) on the
+    design; dates missing for every series (Dec 25th) are dropped, series with
+    other gaps are fitted on their own rows.
+    """
+    from sklearn.linear_model import LinearRegression
+
+    observed = ~np.isnan(y)
+    rows = observed.any(axis=1)
+    complete = observed[rows].all(axis=0)
+    x_train = design[train_dates][rows]
+    coef = np.zeros((y.shape[1], design.shape[1]), dtype=np.float64)
+    intercept = np.zeros(y.shape[1], dtype=np.float64)
+    if complete.any():
+        model = LinearRegression().fit(x_train, y[rows][:, complete])
+        coef[complete], intercept[complete] = model.coef_, model.intercept_
+    for j in np.flatnonzero(~complete):
+        has_y = observed[rows, j]
+        if has_y.sum() > design.shape[1]:
+            model = LinearRegression().fit(x_train[has_y], y[rows][has_y, j])
+            coef[j], intercept[j] = model.coef_, model.intercept_
+        elif has_y.any():
+            intercept[j] = y[rows][has_y, j].mean()
+    return coef, intercept
+
+
+def _fit_shard(start, stop):
+    """Fits one shard and returns (start, stop, forecast) with forecast (n_shard_series, n_forecast_dates)."""
+    from threadpoolctl import threadpool_limits
+
+    design = _shared["design"]
+    train_dates, forecast_dates = _shared["train_dates"], _shared["forecast_dates"]
+    with threadpool_limits(1):
+        # log1p target, as the competition scores RMSLE
+        sales = np.asarray(_shared["sales"][start:stop], dtype=np.float64)
+        y = np.log1p(np.clip(sales[:, train_dates].T, 0.0, None))
+        coef, intercept = _fit_trend(design, train_dates, y)
+        trend = design @ coef.T + intercept  # (n_dates, n_shard_series)
+        forecast = trend[forecast_dates]
+
+        if _shared["residual_model"] == "xgboost":
+            from xgboost import XGBRegressor
+
+            x = _shared["residual_features"][start:stop]
+            residual = y - trend[train_dates]
+            observed = ~np.isnan(residual.T)
+            x_train = x[:, train_dates][observed]
+            model = XGBRegressor(n_jobs=1, **_shared["xgb_params"])
+            model.fit(x_train, residual.T[observed])
+            x_forecast = x[:, forecast_dates].reshape(-1, x.shape[2])
+            forecast = forecast + model.predict(x_forecast).reshape(stop - start, -1).T
+
+    forecast = np.expm1(forecast.T).clip(0.0)
+    # series that never sold in the training window stay at zero
+    never_sold = ~(np.nan_to_num(sales[:, train_dates]) > 0).any(axis=1)
+    forecast[never_sold] = 0.0
+    return start, stop, forecast.astype(np.float32)
+
+
+def train_and_forecast(
+    features,
+    train_start=None,
+    forecast_start=None,
+    workers=None,
+    n_shards=None,
+    residual_model="xgboost",
+    xgb_params=None,
+    work_dir=None,
+):
+    """
+    Fits every series on [train_start, forecast_start) and forecasts from
+    forecast_start to the last date of the grid. forecast_start defaults to
+    the first test date (rows with id >= 0); an earlier date holds out a
+    validation window. residual_model is "xgboost" or None (trend only).
+
+    Returns the long forecast frame: series_id, store_nbr, family, date, id,
+    sales (the actuals, NaN on the test horizon) and sales_pred.
+    """
+    workers = os.cpu_count() if workers is None else workers
+    # a few shards per worker keep the pool busy when shards take uneven time
+    n_shards = 4 * workers if n_shards is None else n_shards
+    xgb_params = {**XGB_PARAMS, **(xgb_params or {})}
+    if residual_model not in ("xgboost", None):
+        raise ValueError(f"Unknown residual_model {residual_model!r}")
+
+    n_series = int(features["series_id"].max()) + 1
+    terms = features[features["series_id"] == 0].reset_index(drop=True)
+    dates = pd.DatetimeIndex(terms["date"])
+    if forecast_start is None:
+        test_dates = features.loc[features["id"] >= 0, "date"]
+        if test_dates.empty:
+            raise ValueError("features has no test rows; pass forecast_start")
+        forecast_start = test_dates.min()
+    forecast_dates = dates >= pd.Timestamp(forecast_start)
+    train_dates = ~forecast_dates
+    if train_start is not None:
+        train_dates &= dates >= pd.Timestamp(train_start)
+    if not train_dates.any() or not forecast_dates.any():
+        raise ValueError("Empty training or forecast window")
+    train_days = dates[train_dates]
+    design = trend_design(terms, annual=(train_days[-1] - train_days[0]).days >= 365)
+
+    with tempfile.TemporaryDirectory(dir=work_dir, prefix="store_sales_") as tmp_dir:
+        paths, _ = write_shared_arrays(features, tmp_dir)
+        init_args = (paths, design, train_dates, forecast_dates, residual_model, xgb_params)
+        forecast = np.empty((n_series, int(forecast_dates.sum())), dtype=np.float32)
+        shards = make_shards(n_series, n_shards)
+        if workers == 1:
+            _init_worker(*init_args)
+            try:
+                for start, stop in shards:
+                    _, _, forecast[start:stop] = _fit_shard(start, stop)
+            finally:
+                # drop the memmaps before the temporary directory is removed
+                _shared.clear()
+        else:
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=init_args) as pool:
+                for start, stop, shard_forecast in pool.map(_fit_shard, *zip(*shards)):
+                    forecast[start:stop] = shard_forecast
+
+    n_dates = len(dates)
+    rows = (np.arange(n_series)[:, None] * n_dates + np.flatnonzero(forecast_dates)[None, :]).ravel()
+    out = features.iloc[rows][["series_id", "store_nbr", "family", "date", "id", "sales"]].reset_index(drop=True)
+    out["sales_pred"] = forecast.ravel()
+    return out
+
+
+def to_submission(forecast):
+    """The competition submission (id, sales) from the test rows of a forecast frame."""
+    test = forecast[forecast["id"] >= 0]
+    return pd.DataFrame({"id": test["id"].to_numpy(), "sales": test["sales_pred"].to_numpy()}).sort_values(
+        "id", ignore_index=True
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from .features import load_features
+
+    parser = argparse.ArgumentParser(description="Fit the store-sales hybrid model in parallel and write a submission.")
+    parser.add_argument("root", help="Folder with the competition CSVs.")
+    parser.add_argument("--output", default="submission.csv")
+    parser.add_argument("--train-start", default="2017-01-01")
+    parser.add_argument("--valid-start", default=None, help="Score a held-out window instead of forecasting test.")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--shards", type=int, default=None)
+    parser.add_argument("--trend-only", action="store_true")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    features = load_features(args.root)
+    print(f"features: {len(features):,} rows in {time.perf_counter() - t0:.1f}s")
+    t0 = time.perf_counter()
+    forecast = train_and_forecast(
+        features,
+        train_start=args.train_start,
+        forecast_start=args.valid_start,
+        workers=args.workers,
+        n_shards=args.shards,
+        residual_model=None if args.trend_only else "xgboost",
+    )
+    print(f"fit: {forecast['series_id'].nunique():,} series in {time.perf_counter() - t0:.1f}s")
+    if args.valid_start is not None:
+        scored = forecast.dropna(subset=["sales"])
+        print(f"RMSLE: {rmsle(scored['sales'], scored['sales_pred']):.4f}")
+    else:
+        to_submission(forecast).to_csv(args.output, index=False)
+        print(f"wrote {args.output}")